@@ -1,52 +1,120 @@
 import sys
-import ee
 import os
+import base64
+import json
+import math
+import threading
+import time
 
-# Check if credentials exist and use persistent authentication
-credentials_path = os.path.expanduser('~/.config/earthengine/credentials')
-if os.path.exists(credentials_path):
-    # Use existing credentials - no need to authenticate again
-    ee.Initialize(project='ee-amanarya1910')
-else:
-    # Only authenticate if credentials don't exist
-    ee.Authenticate(scopes=['https://www.googleapis.com/auth/earthengine', 
-                            'https://www.googleapis.com/auth/devstorage.full_control',
-                            'https://www.googleapis.com/auth/cloud-platform'])
-    ee.Initialize(project='ee-amanarya1910')
-import folium
+from metrics import stage
 
-def generate_map(flood_level=2.0):
-    """Generate map with specified flood level and return HTML as string"""
-    # Load the NY_coastline asset (elevation image)
-    ny_coastline = ee.Image('projects/ee-amanarya1910/assets/NY_coastline')
+EE_PROJECT = 'ee-amanarya1910'
+EE_SCOPES = ['https://www.googleapis.com/auth/earthengine',
+             'https://www.googleapis.com/auth/devstorage.full_control',
+             'https://www.googleapis.com/auth/cloud-platform']
 
-    # Use MODIS land-water mask (0 = water, 1 = land)
-    # modis_land_mask = ee.Image('MODIS/006/MOD44W/2015_01_01').select('water_mask').eq(0)
+NY_COASTLINE_ASSET = 'projects/ee-amanarya1910/assets/NY_coastline'
 
-    # Create flood mask: areas ≤ flood_level AND on land
-    # flooded_land = ny_coastline.lte(flood_level).And(modis_land_mask).selfMask()
-    
-    # Create flood mask: areas ≤ flood_level (without land sea filter)
-    flooded_land = ny_coastline.lte(flood_level).selfMask()
-
-    # Visualization parameters
-    flood_vis_params = {
-        'palette': ['blue'],
-        'opacity': 0.6
-    }
-
-    # Define add_ee_layer if not already defined
-    if not hasattr(folium.Map, 'add_ee_layer'):
-        def add_ee_layer(self, ee_image_object, vis_params, name):
-            map_id_dict = ee.Image(ee_image_object).getMapId(vis_params)
-            folium.raster_layers.TileLayer(
-                tiles=map_id_dict['tile_fetcher'].url_format,
-                attr='Google Earth Engine',
-                name=name,
-                overlay=True,
-                control=True
-            ).add_to(self)
-        folium.Map.add_ee_layer = add_ee_layer
+# Visualization parameters
+FLOOD_VIS_PARAMS = {
+    'palette': ['blue'],
+    'opacity': 0.6
+}
+
+# Flood slider range in templates.html (0-3 m in 0.1 m steps)
+FLOOD_LEVELS = [round(0.1 * i, 1) for i in range(31)]
+
+# 'earthengine' or 'stub' (static tile URLs, no Earth Engine calls; for load tests)
+TILE_BACKEND = os.getenv('FLOOD_TILE_BACKEND', 'earthengine')
+STUB_TILE_URL = '/stub-tiles/{level}/{{z}}/{{x}}/{{y}}.png'
+# Transparent 1x1 PNG served for every stub tile
+STUB_TILE_PNG = base64.b64decode('iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAAC0lEQVR4nGNgAAIAAAUAAXpeqz8AAAAASUVORK5CYII=')
+# Earth Engine map ids expire, so cached tile URLs are refreshed after this many seconds
+TILE_URL_TTL = float(os.getenv('FLOOD_TILE_TTL', '3600'))
+
+_ee_lock = threading.Lock()
+_ee_initialized = False
+_tile_urls = {}
+_tile_lock = threading.Lock()
+
+# The base map is rendered once with this in place of the flood layer's tile URL
+FLOOD_TILE_PLACEHOLDER = '__FLOOD_TILE_URL__'
+_base_map_html = None
+_base_map_lock = threading.Lock()
+
+
+def init_ee(authenticate=True):
+    """Initialize Earth Engine on first use and return the ee module.
+
+    With authenticate=False (background warm-up) a missing credentials file is an
+    error instead of starting the interactive authentication flow.
+    """
+    global _ee_initialized
+    if TILE_BACKEND == 'stub':
+        return None
+    import ee
+    with _ee_lock:
+        if not _ee_initialized:
+            # Check if credentials exist and use persistent authentication
+            credentials_path = os.path.expanduser('~/.config/earthengine/credentials')
+            if not os.path.exists(credentials_path):
+                if not authenticate:
+                    raise RuntimeError(f'No Earth Engine credentials at {credentials_path}')
+                # Only authenticate if credentials don't exist
+                ee.Authenticate(scopes=EE_SCOPES)
+            with stage('ee_initialize'):
+                ee.Initialize(project=EE_PROJECT)
+            _ee_initialized = True
+    return ee
+
+
+def snap_flood_level(flood_level):
+    """The slider level nearest flood_level, so tile URLs are cached for at most len(FLOOD_LEVELS) levels"""
+    level = float(flood_level)
+    if not math.isfinite(level):
+        raise ValueError(f'Flood level must be a finite number, not {flood_level}')
+    return min(FLOOD_LEVELS, key=lambda step: abs(step - level))
+
+def flood_tile_url(flood_level):
+    """Tile URL template of the flood mask at the nearest slider level, cached per level for TILE_URL_TTL"""
+    level = snap_flood_level(flood_level)
+    cached = _tile_urls.get(level)
+    if cached is not None and time.monotonic() - cached[1] < TILE_URL_TTL:
+        return cached[0]
+
+    if TILE_BACKEND == 'stub':
+        url = STUB_TILE_URL.format(level=level)
+    else:
+        ee = init_ee()
+        # Load the NY_coastline asset (elevation image)
+        ny_coastline = ee.Image(NY_COASTLINE_ASSET)
+
+        # Use MODIS land-water mask (0 = water, 1 = land)
+        # modis_land_mask = ee.Image('MODIS/006/MOD44W/2015_01_01').select('water_mask').eq(0)
+
+        # Create flood mask: areas ≤ flood_level AND on land
+        # flooded_land = ny_coastline.lte(flood_level).And(modis_land_mask).selfMask()
+
+        # Create flood mask: areas ≤ flood_level (without land sea filter)
+        flooded_land = ny_coastline.lte(level).selfMask()
+        with stage('ee_getmapid'):
+            url = flooded_land.getMapId(FLOOD_VIS_PARAMS)['tile_fetcher'].url_format
+
+    with _tile_lock:
+        _tile_urls[level] = (url, time.monotonic())
+    return url
+
+def stub_tile():
+    """PNG of a blank tile for STUB_TILE_URL, or None unless the stub backend is active"""
+    return STUB_TILE_PNG if TILE_BACKEND == 'stub' else None
+
+def preload_flood_tiles(levels=FLOOD_LEVELS):
+    """Fetch the tile URL of every slider level up front; returns {level: url}"""
+    return {level: flood_tile_url(level) for level in levels}
+
+def build_base_map():
+    """Folium map with the base layers, controls and a placeholder flood layer"""
+    import folium
 
     # Create a folium map centered on New York with Google Satellite as default
     map_center = [40.7128, -73.5060] # [41.7128, -73.5060]  # NYC coordinates (Manhattan)
@@ -66,15 +134,39 @@ def generate_map(flood_level=2.0):
         control=True
     ).add_to(coast_map)
 
-    # Add flood mask layer with dynamic label
+    # Add flood mask layer; its URL is filled in per flood level by map_document()
     layer_label = f'Flooded Land'
-    coast_map.add_ee_layer(flooded_land, flood_vis_params, layer_label)
+    folium.raster_layers.TileLayer(
+        tiles=FLOOD_TILE_PLACEHOLDER,
+        attr='Google Earth Engine',
+        name=layer_label,
+        overlay=True,
+        control=True
+    ).add_to(coast_map)
 
     # Add layer control
     coast_map.add_child(folium.LayerControl())
+    return coast_map
+
+def base_map_html():
+    """Standalone HTML document of the base map, rendered once per process"""
+    global _base_map_html
+    if _base_map_html is None:
+        with _base_map_lock:
+            if _base_map_html is None:
+                with stage('map_render'):
+                    _base_map_html = build_base_map().get_root().render()
+    return _base_map_html
 
-    # Return the map HTML as string
-    return coast_map._repr_html_()
+def map_document(flood_level=2.0):
+    """HTML document of the map at this flood level: the cached base map plus the flood tile URL"""
+    # The placeholder sits inside a JavaScript string literal
+    tile_url = json.dumps(flood_tile_url(flood_level))[1:-1]
+    return base_map_html().replace(FLOOD_TILE_PLACEHOLDER, tile_url)
+
+def generate_map(flood_level=2.0):
+    """Generate map with specified flood level and return HTML as string"""
+    return map_document(flood_level)
 
 # Get flood level from command-line argument, default to 2.0
 if __name__ == "__main__":
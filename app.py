@@ -1,198 +1,294 @@
-from flask import Flask, render_template, send_from_directory, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
+import math
 import os
+import re
 import sys
-import openai
 import json
 from datetime import datetime
 
 # Import the generate_map function from the script
 sys.path.append('.')
-from NY_coastline_script import generate_map
+from NY_coastline_script import map_document, init_ee, stub_tile
 from tide_data_parser import generate_24_hour_tide_data, get_tide_statistics, generate_date_range_tide_data, get_date_range_statistics
+from tide_data_parser import compact_tide_data, compact_statistics, station_tide_summary
+from tide_data_parser import upcoming_events, next_event, station_keys
+from tide_analytics import exceedance, compare_stations, compare_range, MAX_PHASE_LAG
+import metrics
+import profiling
+import compression
+import assets
+from metrics import stage, ERRORS_TOTAL
+from profiling import profiled
+import warmup
 
-app = Flask(__name__, static_folder='.', template_folder='.')
+app = Flask(__name__, static_folder=None, template_folder='.')
+
+# Per-route latency, status codes and in-flight requests, exposed at /metrics
+metrics.init_app(app)
+# Opt-in cProfile of individual requests (PROFILE_SECRET), viewable at /debug/profiles
+profiling.init_app(app)
+# gzip/brotli for HTML and JSON responses above a size threshold
+compression.init_app(app)
+# Fingerprinted files from static/ with immutable caching; asset_url() in templates
+assets.init_app(app)
 
 # Initialize OpenAI client (API key will be set via environment variable)
 openai_client = None
 
+def get_openai_client():
+    """Import and configure openai on first use; None if no API key is set"""
+    global openai_client
+    if openai_client is None:
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            return None
+        import openai
+        openai.api_key = api_key
+        openai_client = openai
+    return openai_client
+
+def _warm_openai():
+    if get_openai_client() is None:
+        raise RuntimeError('OPENAI_API_KEY not set')
+
+# Earth Engine, folium and OpenAI are set up on first use or by the warm-up thread,
+# so importing the app stays fast and works without network access
+warmup.register('earth_engine', lambda: init_ee(authenticate=False))
+warmup.register('folium', lambda: __import__('folium'))
+# Only the chat needs OpenAI, so it is optional: without it /ready reports degraded, not unready
+warmup.register('openai', _warm_openai, required=False)
+if os.getenv('WARMUP', '1') != '0':
+    warmup.start()
+
+@app.route('/ready')
+def ready():
+    """
+    Readiness probe: 200 once every required backend is warm (optional ones that are
+    not are listed under degraded), 503 with per-backend state until then
+    """
+    is_ready, degraded = warmup.readiness()
+    return jsonify({'ready': is_ready, 'degraded': degraded, 'backends': warmup.status()}), 200 if is_ready else 503
+
 @app.route('/')
+@profiled
 def index():
     # Get flood level from query parameter, default to 2.0
     level = request.args.get('level', default=2.0, type=float)
+    if not math.isfinite(level):
+        return 'Flood level must be a finite number', 400
     
-    # Generate the map HTML
-    map_html = generate_map(level)
+    # Render the template with the slider; the map itself loads from /map in an iframe
+    return render_template('templates.html', flood_level=level)
+
+@app.route('/map')
+@profiled
+def map_frame():
+    """Map document for a flood level, built from the cached base map"""
+    level = request.args.get('level', default=2.0, type=float)
+    if not math.isfinite(level):
+        return 'Flood level must be a finite number', 400
     
-    # Render the template with the map and slider
-    return render_template('templates.html', map_html=map_html, flood_level=level)
+    # Earth Engine and folium are initialized on first use
+    warmup.ensure('earth_engine')
+    warmup.ensure('folium')
+    response = Response(map_document(level), mimetype='text/html')
+    # Tile URLs are cached server-side for FLOOD_TILE_TTL; let browsers reuse the document briefly
+    response.headers['Cache-Control'] = 'public, max-age=600'
+    return response
+
+@app.route('/stub-tiles/<level>/<int:z>/<int:x>/<int:y>.png')
+def stub_tiles(level, z, x, y):
+    """Blank flood tiles for the stub tile backend, so load-tested maps load every tile"""
+    tile = stub_tile()
+    if tile is None:
+        return 'Not found', 404
+    response = Response(tile, mimetype='image/png')
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
 
 @app.route('/tide-predictions')
 def tide_predictions():
     return render_template('tide_predictions.html')
 
-@app.route('/api/port-jefferson-tides')
-def port_jefferson_tides():
-    """API endpoint to get Port Jefferson tide data"""
+def station_tides_response(station):
+    """
+    Tide data and statistics for a station: ?from_date=&to_date= for a range or ?date=
+    for one day. ?format=compact returns columnar arrays instead of per-record dicts.
+    Ranges accept ?interval= (minutes) for an interpolated curve and ?max_points= to
+    downsample the chart series.
+    """
     from_date = request.args.get('from_date')
     to_date = request.args.get('to_date')
     single_date = request.args.get('date')
+    compact = request.args.get('format') == 'compact'
+    max_points = request.args.get('max_points', type=int)
+    interval = request.args.get('interval', type=int)
+    if (max_points is not None and max_points < 3) or (interval is not None and interval < 1):
+        return jsonify({
+            'success': False,
+            'message': 'max_points must be at least 3 and interval at least 1 minute'
+        }), 400
     
     try:
         if from_date and to_date:
             # Date range request
-            tide_data = generate_date_range_tide_data(from_date, to_date, 'portjefferson')
-            statistics = get_date_range_statistics(from_date, to_date, 'portjefferson')
-            
-            if tide_data and statistics:
-                return jsonify({
-                    'success': True,
-                    'from_date': from_date,
-                    'to_date': to_date,
-                    'tide_data': tide_data,
-                    'statistics': statistics
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': 'No tide data available for the specified date range'
-                })
+            tide_data = generate_date_range_tide_data(from_date, to_date, station, max_points, interval)
+            statistics = get_date_range_statistics(from_date, to_date, station)
+            dates = {'from_date': from_date, 'to_date': to_date}
+            missing = 'No tide data available for the specified date range'
         elif single_date:
             # Single date request (backward compatibility)
-            tide_data = generate_24_hour_tide_data(single_date, 'portjefferson')
-            statistics = get_tide_statistics(single_date, 'portjefferson')
-            
-            if tide_data and statistics:
-                return jsonify({
-                    'success': True,
-                    'date': single_date,
-                    'tide_data': tide_data,
-                    'statistics': statistics
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': 'No tide data available for the specified date'
-                })
+            tide_data = generate_24_hour_tide_data(single_date, station)
+            statistics = get_tide_statistics(single_date, station)
+            dates = {'date': single_date}
+            missing = 'No tide data available for the specified date'
         else:
             return jsonify({
                 'success': False,
                 'message': 'Please provide either date or from_date and to_date parameters'
             })
+        
+        if not (tide_data and statistics):
+            return jsonify({
+                'success': False,
+                'message': missing
+            })
+        if compact:
+            tide_data = compact_tide_data(tide_data)
+            statistics = compact_statistics(statistics)
+        return jsonify({
+            'success': True,
+            **dates,
+            'format': 'compact' if compact else 'records',
+            'tide_data': tide_data,
+            'statistics': statistics
+        })
+    except ValueError as e:
+        # Ranges too long to predict or chart
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
+        ERRORS_TOTAL.inc(source='tide_api')
         return jsonify({
             'success': False,
             'message': f'Error retrieving tide data: {str(e)}'
         })
 
+@app.route('/api/port-jefferson-tides')
+@profiled
+def port_jefferson_tides():
+    """API endpoint to get Port Jefferson tide data"""
+    return station_tides_response('portjefferson')
+
 @app.route('/api/miami-tides')
+@profiled
 def miami_tides():
     """API endpoint to get Miami tide data"""
-    from_date = request.args.get('from_date')
-    to_date = request.args.get('to_date')
-    single_date = request.args.get('date')
-    
-    try:
-        if from_date and to_date:
-            # Date range request
-            tide_data = generate_date_range_tide_data(from_date, to_date, 'miami')
-            statistics = get_date_range_statistics(from_date, to_date, 'miami')
-            
-            if tide_data and statistics:
-                return jsonify({
-                    'success': True,
-                    'from_date': from_date,
-                    'to_date': to_date,
-                    'tide_data': tide_data,
-                    'statistics': statistics
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': 'No tide data available for the specified date range'
-                })
-        elif single_date:
-            # Single date request (backward compatibility)
-            tide_data = generate_24_hour_tide_data(single_date, 'miami')
-            statistics = get_tide_statistics(single_date, 'miami')
-            
-            if tide_data and statistics:
-                return jsonify({
-                    'success': True,
-                    'date': single_date,
-                    'tide_data': tide_data,
-                    'statistics': statistics
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': 'No tide data available for the specified date'
-                })
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'Please provide either date or from_date and to_date parameters'
-            })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': f'Error retrieving tide data: {str(e)}'
-        })
+    return station_tides_response('miami')
 
 @app.route('/api/nyc-tides')
+@profiled
 def nyc_tides():
     """API endpoint to get NYC Battery Park tide data"""
-    from_date = request.args.get('from_date')
-    to_date = request.args.get('to_date')
-    single_date = request.args.get('date')
-    
+    return station_tides_response('nyc')
+
+# Most events /api/tides/<station>/next returns
+MAX_UPCOMING_EVENTS = 20
+
+@app.route('/api/tides/<station>/next')
+@profiled
+def next_tides(station):
+    """
+    The next tide events at a station: ?kind=high|low (default either), ?after= ISO
+    time in station local time (default now), ?count= (default 1)
+    """
+    if station not in station_keys():
+        return jsonify({'success': False, 'message': f'Unknown station {station}'}), 404
+    count = request.args.get('count', 1, type=int)
     try:
-        if from_date and to_date:
-            # Date range request
-            tide_data = generate_date_range_tide_data(from_date, to_date, 'nyc')
-            statistics = get_date_range_statistics(from_date, to_date, 'nyc')
-            
-            if tide_data and statistics:
-                return jsonify({
-                    'success': True,
-                    'from_date': from_date,
-                    'to_date': to_date,
-                    'tide_data': tide_data,
-                    'statistics': statistics
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': 'No tide data available for the specified date range'
-                })
-        elif single_date:
-            # Single date request (backward compatibility)
-            tide_data = generate_24_hour_tide_data(single_date, 'nyc')
-            statistics = get_tide_statistics(single_date, 'nyc')
-            
-            if tide_data and statistics:
-                return jsonify({
-                    'success': True,
-                    'date': single_date,
-                    'tide_data': tide_data,
-                    'statistics': statistics
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': 'No tide data available for the specified date'
-                })
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'Please provide either date or from_date and to_date parameters'
-            })
+        events = upcoming_events(station, request.args.get('after') or None, request.args.get('kind'),
+                                 max(1, min(count, MAX_UPCOMING_EVENTS)))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': f'Error retrieving tide data: {str(e)}'
-        })
+        ERRORS_TOTAL.inc(source='tide_api')
+        return jsonify({'success': False, 'message': f'Error retrieving tide data: {str(e)}'})
+    return jsonify({'success': True, 'station': station, 'events': events})
+
+# Most thresholds /api/tides/<station>/exceedance evaluates per request
+MAX_EXCEEDANCE_THRESHOLDS = 50
+
+@app.route('/api/tides/<station>/exceedance')
+@profiled
+def tide_exceedance(station):
+    """
+    Hours above each water level at a station: ?from_date=&to_date= (YYYY-MM-DD),
+    ?thresholds= comma-separated metres, ?interval= curve step in minutes dividing a day (default 6)
+    """
+    if station not in station_keys():
+        return jsonify({'success': False, 'message': f'Unknown station {station}'}), 404
+    interval = request.args.get('interval', 6, type=int)
+    try:
+        from_date = datetime.strptime(request.args.get('from_date', ''), '%Y-%m-%d').date()
+        to_date = datetime.strptime(request.args.get('to_date', ''), '%Y-%m-%d').date()
+        thresholds = [float(value) for value in request.args.get('thresholds', '').split(',') if value.strip()]
+        if not thresholds or len(thresholds) > MAX_EXCEEDANCE_THRESHOLDS:
+            raise ValueError(f'thresholds must list 1 to {MAX_EXCEEDANCE_THRESHOLDS} levels')
+        if not all(math.isfinite(value) for value in thresholds):
+            raise ValueError('thresholds must be finite numbers')
+        if to_date < from_date or interval < 1:
+            raise ValueError('to_date must not precede from_date and interval must be at least 1 minute')
+        if 1440 % interval:
+            # Samples then fall on every midnight, so daily hours split cleanly
+            raise ValueError('interval must divide a day (1440 minutes)')
+        result = exceedance(station, from_date, to_date, thresholds, interval)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        ERRORS_TOTAL.inc(source='tide_api')
+        return jsonify({'success': False, 'message': f'Error retrieving tide data: {str(e)}'})
+    if result is None:
+        return jsonify({'success': False, 'message': 'No tide data available for the specified date range'})
+    return jsonify({'success': True, **result})
+
+# Most stations /api/tides/compare aligns per request
+MAX_COMPARE_STATIONS = 8
+
+@app.route('/api/tides/compare')
+@profiled
+def compare_tides():
+    """
+    Pairwise phase lag and amplitude ratio of stations: ?stations= comma-separated,
+    ?from_date=&to_date= (YYYY-MM-DD, default the next 30 days, or the 30 days ending at a
+    lone to_date), ?interval= minutes (default 6)
+    """
+    stations = list(dict.fromkeys(name.strip() for name in request.args.get('stations', '').split(',') if name.strip()))
+    unknown = [name for name in stations if name not in station_keys()]
+    if unknown:
+        return jsonify({'success': False, 'message': f'Unknown station {", ".join(unknown)}'}), 404
+    interval = request.args.get('interval', 6, type=int)
+    try:
+        if not 2 <= len(stations) <= MAX_COMPARE_STATIONS:
+            raise ValueError(f'stations must list 2 to {MAX_COMPARE_STATIONS} stations')
+        from_date, to_date = (datetime.strptime(request.args[name], '%Y-%m-%d').date() if request.args.get(name) else None
+                              for name in ('from_date', 'to_date'))
+        from_date, to_date = compare_range(stations[0], from_date, to_date)
+        if to_date < from_date or interval < 1:
+            raise ValueError('to_date must not precede from_date and interval must be at least 1 minute')
+        if interval > MAX_PHASE_LAG:
+            # Fewer than 3 lags fall in the search window, too few to locate a peak
+            raise ValueError(f'interval must be at most {MAX_PHASE_LAG} minutes')
+        result = compare_stations(stations, from_date, to_date, interval)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        ERRORS_TOTAL.inc(source='tide_api')
+        return jsonify({'success': False, 'message': f'Error retrieving tide data: {str(e)}'})
+    if result is None:
+        return jsonify({'success': False, 'message': 'No tide data available for the specified date range'})
+    return jsonify({'success': True, **result})
 
 @app.route('/chat', methods=['POST'])
+@profiled
 def chat():
     try:
         data = request.get_json()
@@ -203,16 +299,20 @@ def chat():
         
         # Check if this is a tide-related query
         tide_keywords = ['tide', 'high tide', 'low tide', 'highest tide', 'lowest tide', 'tidal', 'water level']
-        is_tide_query = any(keyword in user_message.lower() for keyword in tide_keywords)
+        is_tide_query = (any(keyword in user_message.lower() for keyword in tide_keywords)
+                         or NEXT_TIDE_PATTERN.search(user_message.lower()) is not None)
+        
+        # Stations with local NOAA data are answered from their event index and rollups,
+        # without MindsDB or OpenAI
+        if is_tide_query:
+            local_response = process_tide_query(user_message) or local_tide_answer(user_message)
+            if local_response:
+                return jsonify({'response': local_response})
         
         # Initialize OpenAI client if not already done
-        global openai_client
-        if openai_client is None:
-            api_key = os.getenv('OPENAI_API_KEY')
-            if not api_key:
-                return jsonify({'error': 'OpenAI API key not configured'}), 500
-            openai.api_key = api_key
-            openai_client = openai
+        if get_openai_client() is None:
+            return jsonify({'error': 'OpenAI API key not configured'}), 500
+        warmup.ensure('openai')
         
         # Handle tide queries with MindsDB integration
         if is_tide_query:
@@ -225,7 +325,8 @@ def chat():
                 
                 if coastal_mindsdb.connection:
                     # Load tide data if not already loaded
-                    coastal_mindsdb.load_tide_data()
+                    with stage('mindsdb_load'):
+                        coastal_mindsdb.load_tide_data()
                     
                     # Process the tide query
                     tide_response = process_tide_query(user_message, coastal_mindsdb)
@@ -240,6 +341,7 @@ def chat():
                     return jsonify({'response': "I can help with tide queries, but MindsDB connection is not available. Please ensure MindsDB is running and try again."})
                     
             except Exception as e:
+                ERRORS_TOTAL.inc(source='chat_tide_query')
                 print(f"Error processing tide query: {str(e)}")
                 # Fall back to general response
         
@@ -316,7 +418,7 @@ def chat():
         - NY_coastline_script.py: Map generation with Earth Engine integration
         - templates.html: Main application interface with slider and map
         - tide_predictions.html: Tide predictions page with station selection
-        - chatbot.js: Chat interface JavaScript functionality
+        - static/chatbot.js: Chat interface JavaScript functionality
         - requirements.txt: Python dependencies
         - README_CHAT.md: Comprehensive documentation
 
@@ -324,7 +426,14 @@ def chat():
         - /: Main flood risk visualization page
         - /tide-predictions: Tide predictions page
         - /chat: AI chat endpoint (POST)
-        - /<filename>: Static file serving
+        - /metrics: Prometheus metrics (request latency, stage timings)
+        - /map: flood map document embedded by the main page
+        - /debug/profiles: opt-in cProfile reports of individual requests
+        - /ready: readiness probe reporting which backends (Earth Engine, folium, OpenAI) are warm; OpenAI is optional
+        - /api/tides/<station>/next: next high/low tide events at a station (kind, after, count)
+        - /api/tides/<station>/exceedance: hours above water levels over a date range (thresholds, interval)
+        - /api/tides/compare: phase lag and amplitude ratio between stations (stations, from_date, to_date)
+        - /static/<name>: fingerprinted static assets
 
         MAP FEATURES:
         - Default: Google Satellite imagery
@@ -353,29 +462,75 @@ def chat():
         IMPORTANT: Keep all responses brief and to the point. Use 1-2 sentences maximum. Be direct and avoid lengthy explanations."""
         
         # Call OpenAI API
-        response = openai_client.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
+        with stage('openai_chat'):
+            response = openai_client.ChatCompletion.create(
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": user_message}
+                ],
+                max_tokens=150,
+                temperature=0.7
+            )
         
         bot_response = response.choices[0].message.content
         
         return jsonify({'response': bot_response})
         
     except Exception as e:
+        ERRORS_TOTAL.inc(source='chat')
         print(f"Error in chat endpoint: {str(e)}")
         return jsonify({'error': 'Failed to get response from AI'}), 500
 
-def process_tide_query(user_message, coastal_mindsdb):
+# Chat location names of the stations with local NOAA files
+LOCAL_TIDE_STATIONS = {'nyc': 'nyc', 'miami': 'miami', 'port jefferson': 'portjefferson'}
+MONTH_NAMES = ['january', 'february', 'march', 'april', 'may', 'june',
+               'july', 'august', 'september', 'october', 'november', 'december']
+
+def local_tide_answer(user_message):
+    """
+    Answer highest/lowest/average tide questions about a local station from its
+    monthly rollup; None for other questions
+    """
+    message = user_message.lower()
+    location = next((name for name in LOCAL_TIDE_STATIONS if name in message), None)
+    if location is None:
+        return None
+    month = next((i + 1 for i, name in enumerate(MONTH_NAMES) if name in message), None)
+    where = location.title() + (f" in {MONTH_NAMES[month - 1].title()}" if month else '')
+    
+    summary = station_tide_summary(LOCAL_TIDE_STATIONS[location], month)
+    if summary is None:
+        return f"No tide data available for {where}."
+    if 'highest' in message:
+        tide = summary['highest']
+        return f"The highest tide at {where} was {tide['prediction']:.2f}m on {tide['date']} at {tide['time']}."
+    if 'lowest' in message:
+        tide = summary['lowest']
+        return f"The lowest tide at {where} was {tide['prediction']:.2f}m on {tide['date']} at {tide['time']}."
+    return f"Average tide at {where}: {summary['mean_level']:.2f}m ({summary['events']} data points)."
+
+# "next tide", "next high tide", "next low water", ... (not "lowest tide next month")
+NEXT_TIDE_PATTERN = re.compile(r'\bnext\s+(?:(high|low)\s+)?(?:tide|water)\b')
+
+def process_tide_query(user_message, coastal_mindsdb=None):
     """
-    Process tide-related queries using MindsDB integration
+    Process tide-related queries. Next-tide questions about a local station are answered
+    from its event index; the rest use MindsDB integration (None without coastal_mindsdb)
     """
     try:
+        message = user_message.lower()
+        intent = NEXT_TIDE_PATTERN.search(message)
+        local_station = next((name for name in LOCAL_TIDE_STATIONS if name in message), None)
+        if intent and local_station:
+            tide = next_event(LOCAL_TIDE_STATIONS[local_station], kind=intent.group(1))
+            if tide is None:
+                return f"No tide data available for {local_station.title()}."
+            label = {'H': 'high', 'L': 'low'}[tide['type']]
+            return f"The next {label} tide at {local_station.title()} is at {tide['time']} on {tide['date']} ({tide['prediction']:.2f}m)."
+        if coastal_mindsdb is None:
+            return None
+        
         # Extract location and time information from user message
         locations = ['nyc', 'boston', 'miami', 'seattle', 'san francisco', 'galveston', 'port jefferson']
         months = ['january', 'february', 'march', 'april', 'may', 'june', 
@@ -420,7 +575,8 @@ def process_tide_query(user_message, coastal_mindsdb):
                 LIMIT 1
                 """
             
-            result = coastal_mindsdb.connection.query(query)
+            with stage('mindsdb_query'):
+                result = coastal_mindsdb.connection.query(query)
             
             if result and len(result) > 0:
                 tide_data = result[0]
@@ -452,7 +608,8 @@ def process_tide_query(user_message, coastal_mindsdb):
                 LIMIT 1
                 """
             
-            result = coastal_mindsdb.connection.query(query)
+            with stage('mindsdb_query'):
+                result = coastal_mindsdb.connection.query(query)
             
             if result and len(result) > 0:
                 tide_data = result[0]
@@ -468,7 +625,8 @@ def process_tide_query(user_message, coastal_mindsdb):
             WHERE station = '{mentioned_location.replace(' ', '')}'
             """
             
-            result = coastal_mindsdb.connection.query(query)
+            with stage('mindsdb_query'):
+                result = coastal_mindsdb.connection.query(query)
             
             if result and len(result) > 0:
                 stats = result[0]
@@ -481,13 +639,9 @@ def process_tide_query(user_message, coastal_mindsdb):
             return "I can help with tide queries. Try asking about highest/lowest tides for specific locations like NYC, Boston, Miami, Seattle, San Francisco, Galveston, or Port Jefferson."
     
     except Exception as e:
+        ERRORS_TOTAL.inc(source='process_tide_query')
         print(f"Error processing tide query: {str(e)}")
         return "I encountered an error processing your tide query. Please try again or ask about available tide stations."
 
-# Optional: Serve other static files if needed
-@app.route('/<path:filename>')
-def static_files(filename):
-    return send_from_directory('.', filename)
-
 if __name__ == '__main__':
     app.run(debug=True, port=5001) 
\ No newline at end of file
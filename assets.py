@@ -0,0 +1,116 @@
+"""
+Fingerprinted static assets.
+
+Only files under static/ are served, at /static/<name>.<hash>.<ext> with a
+far-future immutable Cache-Control. Templates link them with asset_url():
+
+    <script src="{{ asset_url('chatbot.js') }}"></script>
+
+`python build_assets.py` writes the fingerprinted copies plus precompressed .gz
+and .br variants and a manifest to static/dist/. Without a build the
+fingerprints are computed from static/ at startup and files are sent as is.
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+
+from compression import accepted_encodings
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Precompressed variants in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(path, length=12):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:length]
+
+
+def fingerprinted_name(name, digest):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def source_files(static_dir=STATIC_DIR):
+    """Asset names relative to static/, excluding the build output"""
+    names = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != DIST_DIR]
+        for file in files:
+            names.append(os.path.relpath(os.path.join(root, file), static_dir).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def scan_manifest(static_dir=STATIC_DIR):
+    """{name: fingerprinted name} computed from the sources"""
+    return {name: fingerprinted_name(name, fingerprint(os.path.join(static_dir, name)))
+            for name in source_files(static_dir)}
+
+
+class AssetManifest:
+    """Maps asset names to fingerprinted names and back to files on disk"""
+
+    def __init__(self, static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+        self.static_dir = static_dir
+        self.dist_dir = dist_dir
+        manifest_path = os.path.join(dist_dir, 'manifest.json')
+        self.built = os.path.exists(manifest_path)
+        if self.built:
+            with open(manifest_path) as f:
+                self.names = json.load(f)
+        else:
+            self.names = scan_manifest(static_dir)
+        self.sources = {hashed: name for name, hashed in self.names.items()}
+
+    def url_path(self, name):
+        return self.names.get(name, name)
+
+    def resolve(self, filename, accept_encoding=None):
+        """(path, content encoding or None, immutable) for a requested file, or None"""
+        if filename in self.sources:
+            if self.built:
+                base = os.path.join(self.dist_dir, filename)
+                accepted = accepted_encodings(accept_encoding)
+                for encoding, suffix in ENCODINGS:
+                    if encoding in accepted and os.path.exists(base + suffix):
+                        return base + suffix, encoding, True
+                return base, None, True
+            return os.path.join(self.static_dir, self.sources[filename]), None, True
+        if filename in self.names:
+            # Unfingerprinted name (old cached pages); served but revalidated each time
+            return os.path.join(self.static_dir, filename), None, False
+        return None
+
+
+def init_app(app, static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Register the /static route and the asset_url() template helper"""
+    from flask import abort, request, send_file, url_for
+
+    manifest = AssetManifest(static_dir, dist_dir)
+
+    def asset_url(name):
+        return url_for('static_asset', filename=manifest.url_path(name))
+
+    app.add_template_global(asset_url, 'asset_url')
+
+    @app.route('/static/<path:filename>')
+    def static_asset(filename):
+        resolved = manifest.resolve(filename, request.headers.get('Accept-Encoding'))
+        if resolved is None:
+            abort(404)
+        path, encoding, immutable = resolved
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=not immutable,
+                             max_age=None)
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE if immutable else 'no-cache'
+        return response
+
+    return manifest
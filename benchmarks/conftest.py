@@ -0,0 +1,75 @@
+"""
+Shared fixtures for the benchmark suite: synthetic multi-year NOAA files and a
+Flask test client that does not need Earth Engine or OpenAI.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generate_noaa_data import generate_dataset
+
+START_YEAR = 2020
+YEARS = 5
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    """
+    pytest.ini gates every run on the committed baseline (--benchmark-compare-fail);
+    skip the gate, with the plugin's warning, when there is no baseline to compare
+    against (another machine type, or while recording a new one)
+    """
+    session = getattr(config, '_benchmarksession', None)
+    if session is not None and session.compare_fail and not session.compared_mapping:
+        session.compare_fail = None
+
+
+@pytest.fixture(scope='session')
+def synthetic_registry(tmp_path_factory):
+    """Five years of synthetic predictions for three stations (Metric, Feet, Metric), as text and XML"""
+    directory = str(tmp_path_factory.mktemp('noaa'))
+    registry = generate_dataset(directory, n_stations=3, start_year=START_YEAR, years=YEARS,
+                                formats=('txt', 'xml'), subordinate_fraction=0)
+    return dict(zip(['portjefferson', 'miami', 'nyc'], registry.values()))
+
+
+@pytest.fixture(scope='session')
+def synthetic_station_files(synthetic_registry):
+    """Text export path for each bundled station name"""
+    return {name: station['files']['txt'] for name, station in synthetic_registry.items()}
+
+
+@pytest.fixture(scope='session')
+def synthetic_xml_files(synthetic_registry):
+    """XML export path for each bundled station name"""
+    return {name: station['files']['xml'] for name, station in synthetic_registry.items()}
+
+
+@pytest.fixture(scope='session')
+def tide_cache_dir(tmp_path_factory):
+    """Binary tide cache for the synthetic files, kept out of the repository's .tide_cache/"""
+    return str(tmp_path_factory.mktemp('tide_cache'))
+
+
+@pytest.fixture
+def synthetic_stations(synthetic_station_files, tide_cache_dir, monkeypatch):
+    """Point tide_data_parser at the synthetic files"""
+    import tide_data_parser
+    monkeypatch.setattr(tide_data_parser, 'STATION_FILES', synthetic_station_files)
+    monkeypatch.setattr(tide_data_parser, 'TIDE_CACHE_DIR', tide_cache_dir)
+    return synthetic_station_files
+
+
+@pytest.fixture
+def client(synthetic_stations, monkeypatch):
+    """Flask test client; backend warm-up is disabled so Earth Engine is never initialized"""
+    pytest.importorskip('flask')
+    monkeypatch.setenv('WARMUP', '0')
+    import app
+    app.app.config['TESTING'] = True
+    return app.app.test_client()
@@ -0,0 +1,68 @@
+"""
+Benchmarks for the tide API routes through Flask's test client.
+"""
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+
+def test_tides_single_date(benchmark, client):
+    response = benchmark(client.get, '/api/port-jefferson-tides?date=2021-06-15')
+    assert response.get_json()['success']
+
+
+def test_tides_month_range(benchmark, client):
+    response = benchmark(client.get, '/api/nyc-tides?from_date=2021-06-01&to_date=2021-06-30')
+    assert response.get_json()['success']
+
+
+def test_tides_year_range(benchmark, client):
+    response = benchmark(client.get, '/api/miami-tides?from_date=2021-01-01&to_date=2021-12-31')
+    assert response.get_json()['success']
+
+
+def test_tides_year_range_compact(benchmark, client):
+    response = benchmark(client.get, '/api/miami-tides?from_date=2021-01-01&to_date=2021-12-31&format=compact')
+    assert response.get_json()['success']
+
+
+def test_tides_multi_year_range_max_points(benchmark, client):
+    response = benchmark(client.get, '/api/miami-tides?from_date=2020-01-01&to_date=2024-12-31'
+                                     '&format=compact&max_points=1000')
+    assert len(response.get_json()['tide_data']['heights']) <= 1000
+
+
+def test_tides_prediction_range_limit(benchmark, client):
+    response = benchmark(client.get, '/api/nyc-tides?from_date=0001-01-01&to_date=9999-12-31')
+    assert response.status_code == 400
+
+
+def test_next_tides(benchmark, client):
+    response = benchmark(client.get, '/api/tides/nyc/next?after=2022-03-14T09:30&kind=high&count=3')
+    assert len(response.get_json()['events']) == 3
+
+
+def test_tide_exceedance(benchmark, client):
+    response = benchmark(client.get, '/api/tides/nyc/exceedance?from_date=2021-01-01&to_date=2021-12-31&thresholds=1.0,1.5')
+    assert len(response.get_json()['thresholds'][0]['daily_hours']) == 365
+
+
+def test_compare_tides(benchmark, client):
+    response = benchmark(client.get, '/api/tides/compare?stations=nyc,portjefferson&from_date=2021-06-01&to_date=2021-06-30')
+    assert response.get_json()['pairs'][0]['reference'] == 'nyc'
+
+
+def test_tides_year_range_compact_gzip(benchmark, client):
+    response = benchmark(client.get, '/api/miami-tides?from_date=2021-01-01&to_date=2021-12-31&format=compact',
+                         headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+def test_map_document(benchmark, client, monkeypatch):
+    pytest.importorskip('folium')
+    import NY_coastline_script
+    monkeypatch.setattr(NY_coastline_script, 'TILE_BACKEND', 'stub')
+    response = benchmark(client.get, '/map?level=1.5')
+    assert b'/stub-tiles/1.5/' in response.data
+    assert client.get('/stub-tiles/1.5/10/301/384.png').mimetype == 'image/png'
@@ -0,0 +1,139 @@
+"""
+Benchmarks for tide_data_parser on five years of synthetic NOAA predictions.
+"""
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import numpy as np
+
+import tide_analytics
+import tide_data_parser as tdp
+import tide_harmonics
+
+DAY = '2021-06-15'
+RANGE = ('2021-06-01', '2021-06-30')
+LONG_RANGE = ('2020-01-01', '2024-12-31')
+# Past the end of the synthetic files, answered by the harmonic engine
+PREDICTED_DAY = '2030-06-15'
+
+
+def test_read_tide_file_metric(benchmark, synthetic_stations):
+    arrays = benchmark(tdp.read_tide_file, synthetic_stations['portjefferson'])
+    assert len(arrays['times']) > 7000 and arrays['malformed']['count'] == 0
+
+
+def test_read_tide_file_feet(benchmark, synthetic_stations):
+    arrays = benchmark(tdp.read_tide_file, synthetic_stations['miami'])
+    assert arrays['metadata']['Units'] == 'Feet'
+
+
+def test_read_tide_xml(benchmark, synthetic_stations, synthetic_xml_files):
+    arrays = benchmark(tdp.read_tide_file, synthetic_xml_files['portjefferson'])
+    text_arrays = tdp.read_tide_file(synthetic_stations['portjefferson'])
+    assert (arrays['times'] == text_arrays['times']).all()
+    assert (arrays['heights'] == text_arrays['heights']).all()
+
+
+def test_load_tide_file_cached(benchmark, synthetic_stations, tide_cache_dir):
+    path = synthetic_stations['portjefferson']
+    tdp.load_tide_file(path, tide_cache_dir)  # Write the cache file
+    arrays = benchmark(tdp.load_tide_file, path, tide_cache_dir)
+    assert (arrays['times'] == tdp.read_tide_file(path)['times']).all()
+
+
+def test_parse_tide_data_metric(benchmark, synthetic_stations):
+    records = benchmark(tdp.parse_tide_data, 'portjefferson')
+    assert len(records) > 7000
+
+
+def test_parse_tide_data_feet(benchmark, synthetic_stations):
+    records = benchmark(tdp.parse_tide_data, 'miami')
+    assert records[0]['units'] == 'meters'
+
+
+def test_predictions_for_date(benchmark, synthetic_stations):
+    predictions = benchmark(tdp.get_tide_predictions_for_date, DAY, 'portjefferson')
+    assert predictions
+
+
+def test_generate_24_hour_tide_data(benchmark, synthetic_stations):
+    data = benchmark(tdp.generate_24_hour_tide_data, DAY, 'portjefferson')
+    assert len(data['heights']) == 24
+
+
+def test_tide_statistics(benchmark, synthetic_stations):
+    stats = benchmark(tdp.get_tide_statistics, DAY, 'portjefferson')
+    assert stats['tidal_range'] > 0
+
+
+def test_date_range_tide_data(benchmark, synthetic_stations):
+    data = benchmark(tdp.generate_date_range_tide_data, *RANGE, 'portjefferson')
+    assert data['heights']
+
+
+def test_date_range_tide_data_downsampled(benchmark, synthetic_stations):
+    data = benchmark(tdp.generate_date_range_tide_data, *LONG_RANGE, 'portjefferson', 1000)
+    assert len(data['heights']) <= 1000 and data['total_points'] > 7000
+
+
+def test_date_range_curve_downsampled(benchmark, synthetic_stations):
+    data = benchmark(tdp.generate_date_range_tide_data, '2021-01-01', '2021-03-31', 'portjefferson', 1000, 10)
+    events = tdp.generate_date_range_tide_data('2021-01-01', '2021-03-31', 'portjefferson')['predictions']
+    assert len(data['heights']) == 1000 and len(data['predictions']) == len(events)
+
+
+def test_date_range_statistics_month(benchmark, synthetic_stations):
+    stats = benchmark(tdp.get_date_range_statistics, *RANGE, 'portjefferson')
+    assert stats['total_highs'] > 0
+
+
+def test_date_range_statistics_multi_year(benchmark, synthetic_stations):
+    stats = benchmark(tdp.get_date_range_statistics, *LONG_RANGE, 'portjefferson')
+    assert stats['total_highs'] > 3000
+
+
+def test_station_tide_summary_month(benchmark, synthetic_stations):
+    summary = benchmark(tdp.station_tide_summary, 'portjefferson', 3)
+    assert summary['highest']['date'][5:7] == '03'
+
+
+def test_next_high_tide(benchmark, synthetic_stations):
+    event = benchmark(tdp.next_event, 'portjefferson', '2022-03-14T09:30', 'high')
+    assert event['type'] == 'H' and event['datetime'] > '2022-03-14T09:30'
+
+
+def test_exceedance_long_range(benchmark, synthetic_stations):
+    from_date, to_date = (np.datetime64(day).astype(object) for day in LONG_RANGE)
+    result = benchmark(tide_analytics.exceedance, 'portjefferson', from_date, to_date, [0.5, 1.0, 1.5, 2.0])
+    hours = [row['hours_above'] for row in result['thresholds']]
+    assert hours == sorted(hours, reverse=True) and len(result['days']) == 1827
+
+
+def test_compare_stations_year(benchmark, synthetic_stations):
+    from_date, to_date = np.datetime64('2021-01-01').astype(object), np.datetime64('2021-12-31').astype(object)
+    result = benchmark(tide_analytics.compare_stations, ['portjefferson', 'miami', 'nyc'], from_date, to_date)
+    assert len(result['pairs']) == 3 and all(abs(pair['lag_minutes']) <= 372 for pair in result['pairs'])
+
+
+def test_harmonic_24_hour_tide_data(benchmark, synthetic_stations):
+    tdp.station_constituents('portjefferson')  # Fit once outside the timing
+    data = benchmark(tdp.generate_24_hour_tide_data, PREDICTED_DAY, 'portjefferson')
+    assert data['source'] == 'harmonic' and len(data['predictions']) >= 3
+
+
+def test_harmonic_levels_year(benchmark, synthetic_stations):
+    table = tdp.station_constituents('portjefferson')
+    times = np.arange(np.datetime64('2030-01-01T00:00'), np.datetime64('2031-01-01T00:00'), np.timedelta64(6, 'm'))
+    levels = benchmark(tide_harmonics.predict_levels, table, times)
+    assert len(levels) == len(times)
+
+
+def test_subordinate_range_statistics(benchmark, synthetic_stations, monkeypatch):
+    monkeypatch.setattr(tdp, 'SUBORDINATE_STATIONS', {})
+    offsets = {'time_high': 25, 'time_low': 40, 'height_high': ('*', 0.95), 'height_low': ('+', -0.02)}
+    tdp.register_subordinate_station('derived', 'portjefferson', offsets, {'StationName': 'Derived'})
+    stats = benchmark(tdp.get_date_range_statistics, *RANGE, 'derived')
+    reference = tdp.get_date_range_statistics(*RANGE, 'portjefferson')
+    assert stats['total_highs'] == reference['total_highs']
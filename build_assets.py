@@ -0,0 +1,68 @@
+"""
+Build fingerprinted, precompressed static assets.
+
+For every file under static/ (except static/dist/) writes
+static/dist/<name>.<hash>.<ext> plus .gz and (with the optional `brotli`
+package) .br variants, and static/dist/manifest.json mapping names to
+fingerprinted names. The app serves these with immutable caching (assets.py).
+
+    python build_assets.py
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+
+from assets import DIST_DIR, STATIC_DIR, scan_manifest
+from compression import BROTLI_AVAILABLE
+
+if BROTLI_AVAILABLE:
+    import brotli
+
+# Below this size compressed variants are not worth a separate file
+MIN_SIZE = 256
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Write the fingerprinted files and manifest; returns the manifest"""
+    manifest = scan_manifest(static_dir)
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+
+    for name, hashed in manifest.items():
+        target = os.path.join(dist_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(static_dir, name), target)
+        with open(target, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_SIZE:
+            continue
+        with open(target + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if BROTLI_AVAILABLE:
+            with open(target + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.description = "Fingerprint and precompress static/ into static/dist/."
+    parser.add_argument('--static-dir', default=STATIC_DIR, help='Source directory')
+    parser.add_argument('--dist-dir', default=DIST_DIR, help='Output directory')
+    args = parser.parse_args()
+    manifest = build(args.static_dir, args.dist_dir)
+    for name, hashed in manifest.items():
+        path = os.path.join(args.dist_dir, hashed)
+        sizes = [f"{os.path.getsize(path)} B"]
+        sizes += [f"{suffix} {os.path.getsize(path + suffix)} B" for suffix in ('.gz', '.br')
+                  if os.path.exists(path + suffix)]
+        print(f"✅ {name} -> {hashed} ({', '.join(sizes)})")
+    if not BROTLI_AVAILABLE:
+        print("⚠️ brotli is not installed; only .gz variants were written (pip install brotli)")
@@ -0,0 +1,82 @@
+"""
+Response compression for the Flask app.
+
+HTML, JSON and other text responses of at least COMPRESS_MIN_SIZE bytes are
+compressed with brotli (when the optional `brotli` package is installed and the
+client accepts it) or gzip. Streamed and file responses are left untouched.
+
+    compression.init_app(app)
+"""
+
+import gzip
+import os
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/javascript',
+    'application/json', 'application/javascript', 'image/svg+xml'
+}
+
+
+def accepted_encodings(header):
+    """Encodings accepted by an Accept-Encoding header, ignoring those with q=0"""
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if BROTLI_AVAILABLE and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def init_app(app, min_size=COMPRESS_MIN_SIZE):
+    """Compress eligible responses in an after_request hook"""
+    from flask import request
+
+    @app.after_request
+    def _compress_response(response):
+        if (response.mimetype not in COMPRESSIBLE_TYPES
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or not 200 <= response.status_code < 300):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Bulk DataFrame writers for the coastal datasets.
+Replaces the write-CSV / upload / delete round trip in mindsdb_integration.py
+with sinks that take DataFrame batches directly.
+
+    with SQLiteSink('coastal.db', 'tide_predictions') as sink:
+        sink.write(tide_df)
+"""
+
+import abc
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+
+class DataSink(abc.ABC):
+    """
+    Base class for bulk writers.
+    Frames passed to write() are split into batch_size rows and each batch is timed.
+    """
+
+    def __init__(self, table, batch_size=50000):
+        self.table = table
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.batch_timings = []  # (rows, seconds) per batch
+        self.closed = False
+
+    def write(self, frame):
+        """Write a DataFrame, batch by batch"""
+        for start in range(0, len(frame), self.batch_size):
+            batch = frame.iloc[start:start + self.batch_size]
+            started = time.perf_counter()
+            self._write_batch(batch)
+            self.batch_timings.append((len(batch), time.perf_counter() - started))
+            self.rows_written += len(batch)
+
+    def close(self):
+        """Finish writing and print a summary (once)"""
+        if self.closed:
+            return
+        self.closed = True
+        self._finish()
+        seconds = sum(t for _, t in self.batch_timings)
+        print(f"✅ Wrote {self.rows_written} rows to {self.table} "
+              f"in {len(self.batch_timings)} batches ({seconds:.2f}s)")
+
+    def abort(self):
+        """Discard what was written so a failed load leaves no half-written table"""
+        if self.closed:
+            return
+        self.closed = True
+        self._abort()
+        print(f"⚠️ Discarded {self.rows_written} rows for {self.table}")
+
+    def summary(self):
+        seconds = sum(t for _, t in self.batch_timings)
+        return {
+            'table': self.table,
+            'rows': self.rows_written,
+            'batches': len(self.batch_timings),
+            'seconds': seconds,
+            'rows_per_second': self.rows_written / seconds if seconds else None
+        }
+
+    @abc.abstractmethod
+    def _write_batch(self, batch):
+        """Write one batch of at most batch_size rows"""
+
+    def _finish(self):
+        pass
+
+    def _abort(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _column_values(series):
+    """Python values for one column, as sqlite3 can bind them"""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.dt.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    return series.tolist()
+
+
+class SQLiteSink(DataSink):
+    """Bulk insert into SQLite with executemany, one transaction per batch"""
+
+    def __init__(self, database, table, batch_size=50000, replace=True):
+        super().__init__(table, batch_size)
+        self.connection = sqlite3.connect(database) if isinstance(database, str) else database
+        self.replace = replace
+        self._insert_sql = None
+
+    def _create_table(self, batch):
+        columns = ', '.join(f'"{c}" {_sql_type(batch[c].dtype)}' for c in batch.columns)
+        placeholders = ', '.join('?' for _ in batch.columns)
+        with self.connection:
+            if self.replace:
+                self.connection.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" ({columns})')
+        self._insert_sql = f'INSERT INTO "{self.table}" VALUES ({placeholders})'
+
+    def _write_batch(self, batch):
+        if self._insert_sql is None:
+            self._create_table(batch)
+        rows = zip(*(_column_values(batch[c]) for c in batch.columns))
+        with self.connection:
+            self.connection.executemany(self._insert_sql, rows)
+
+    def _abort(self):
+        # Batches commit one by one, so a replaced table is dropped rather than left partial
+        if self.replace and self._insert_sql is not None:
+            with self.connection:
+                self.connection.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+
+
+class DuckDBSink(DataSink):
+    """Register each batch with DuckDB (no serialization) and insert it with SQL"""
+
+    def __init__(self, database, table, batch_size=500000, replace=True):
+        if not DUCKDB_AVAILABLE:
+            raise ImportError("duckdb is not installed. Install it with: pip install duckdb")
+        super().__init__(table, batch_size)
+        self.connection = duckdb.connect(database) if isinstance(database, str) else database
+        self.replace = replace
+        self._created = False
+
+    def _write_batch(self, batch):
+        self.connection.register('_sink_batch', batch)
+        try:
+            if not self._created:
+                verb = 'CREATE OR REPLACE TABLE' if self.replace else 'CREATE TABLE IF NOT EXISTS'
+                self.connection.execute(f'{verb} "{self.table}" AS SELECT * FROM _sink_batch')
+                self._created = True
+            else:
+                self.connection.execute(f'INSERT INTO "{self.table}" SELECT * FROM _sink_batch')
+        finally:
+            self.connection.unregister('_sink_batch')
+
+    def _abort(self):
+        if self.replace and self._created:
+            self.connection.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+
+
+class MindsDBSink(DataSink):
+    """
+    Serialize batches into a CSV spool file and upload it to MindsDB on close.
+    The spool stays in memory up to spool_bytes and then moves to a temporary file,
+    so streaming a full archive does not hold the whole CSV in RAM. Nothing is
+    written to the working directory, so concurrent runs cannot collide.
+    """
+
+    def __init__(self, connection, datasource, table, batch_size=50000, spool_bytes=64 * 1024 * 1024):
+        super().__init__(table, batch_size)
+        self.connection = connection
+        self.datasource = datasource
+        self.spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        self.upload_seconds = None
+
+    def _write_batch(self, batch):
+        batch.to_csv(self.spool, header=self.spool.tell() == 0, index=False,
+                     date_format='%Y-%m-%dT%H:%M:%S')
+
+    def _finish(self):
+        try:
+            if not self.rows_written:
+                return
+            self.spool.seek(0)
+            started = time.perf_counter()
+            self.connection.upload_file(self.spool, self.datasource, self.table)
+            self.upload_seconds = time.perf_counter() - started
+        finally:
+            self.spool.close()
+
+    def _abort(self):
+        self.spool.close()
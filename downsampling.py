@@ -0,0 +1,67 @@
+"""
+Chart downsampling.
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013) keeps the points that carry the
+visual shape of a series: the first and last points, plus one point per bucket,
+the one forming the largest triangle with its neighbouring buckets. The original
+algorithm anchors each triangle on the point picked in the previous bucket, which
+makes it sequential; here it is anchored on the previous bucket's average instead,
+so every bucket is scored at once in one (buckets x bucket width) matrix.
+
+    index = downsample(minutes, heights, max_points=500, keep=extreme_positions)
+"""
+
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """Sorted indices of n_out points of (x, y) chosen by LTTB (all points if n_out >= len(x))"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    # Interior points 1..n-2 split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+    counts = stops - starts
+    mean_x = np.add.reduceat(x[:n - 1], starts) / counts
+    mean_y = np.add.reduceat(y[:n - 1], starts) / counts
+    # Triangle corners on either side of each bucket
+    ax, ay = np.r_[x[0], mean_x[:-1]], np.r_[y[0], mean_y[:-1]]
+    cx, cy = np.r_[mean_x[1:], x[-1]], np.r_[mean_y[1:], y[-1]]
+
+    candidates = starts[:, None] + np.arange(counts.max())[None, :]
+    valid = candidates < stops[:, None]
+    candidates = np.where(valid, candidates, starts[:, None])
+    bx, by = x[candidates], y[candidates]
+    area = np.abs((ax - cx)[:, None] * (by - ay[:, None]) - (ax[:, None] - bx) * (cy - ay)[:, None])
+    area[~valid] = -1
+    chosen = candidates[np.arange(len(starts)), area.argmax(axis=1)]
+    return np.r_[0, chosen, n - 1]
+
+
+def downsample(x, y, max_points, keep=None):
+    """
+    Sorted indices of at most max_points points of (x, y). Indices in keep (e.g. the
+    high and low waters) are always included when they fit, and LTTB fills the
+    remaining budget from the other points. When keep alone exceeds max_points,
+    LTTB runs over the kept points, always retaining their highest and lowest.
+    """
+    n = len(x)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.unique(np.asarray([] if keep is None else keep, dtype=np.int64))
+
+    if len(keep) >= max_points:
+        subset = lttb_indices(np.asarray(x)[keep], y[keep], max_points - 2)
+        extremes = [keep[y[keep].argmax()], keep[y[keep].argmin()]]
+        return np.union1d(keep[subset], extremes)
+
+    rest = np.setdiff1d(np.arange(n), keep, assume_unique=True)
+    chosen = rest[lttb_indices(np.asarray(x)[rest], y[rest], max_points - len(keep))]
+    return np.union1d(chosen, keep)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Synthetic NOAA tide prediction generator for scale testing.
+
+Writes High/Low prediction files in the same TXT and XML layouts as the
+files in HighTide/ for any number of stations and years, so benchmarks and
+load tests can run against 10-year x 100-station datasets offline. Highs and
+lows come from tide_harmonics.predict_extremes and subordinate stations from
+tide_offsets.apply_offsets, so the files follow the conventions (LST_LDT clock,
+offsets) of the code that reads them.
+
+    python generate_noaa_data.py synthetic_tides --stations 100 --years 10
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+import tide_harmonics
+import tide_offsets
+from tide_data_parser import CLOCK_LABELS, WEEKDAYS
+
+DISCLAIMER = ("Disclaimer: These data are based upon the latest information available as of "
+              "the date of your request, and may differ from the published tide tables.")
+
+
+def random_constituents(rng):
+    """Harmonic table (see tide_harmonics) for a mixed semidiurnal station, amplitudes in m, phases in deg"""
+    m2 = rng.uniform(0.3, 1.2)
+    k1 = rng.uniform(0.05, 0.45)
+    amplitudes = {
+        'M2': m2,
+        'S2': m2 * rng.uniform(0.15, 0.25),
+        'N2': m2 * rng.uniform(0.18, 0.24),
+        'K2': m2 * rng.uniform(0.04, 0.07),
+        'K1': k1,
+        'O1': k1 * rng.uniform(0.6, 0.8),
+        'P1': k1 * rng.uniform(0.3, 0.35),
+        'Q1': k1 * rng.uniform(0.15, 0.2),
+    }
+    # Put the datum near mean lower low water
+    z0 = m2 + amplitudes['S2'] * 0.5 + 0.5 * (k1 + amplitudes['O1'])
+    return {
+        'z0': z0,
+        'time_zone': 'LST_LDT',
+        'constituents': {name: {'amplitude': amplitude, 'phase': rng.uniform(0, 360)}
+                         for name, amplitude in amplitudes.items()},
+    }
+
+
+def _event_columns(times, heights, types, units):
+    days = times.astype('datetime64[D]')
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    dates = np.char.replace(np.datetime_as_string(unique_days), '-', '/')[day_index]
+    weekdays = WEEKDAYS[days.astype(np.int64) % 7]
+    clock = CLOCK_LABELS[(times - days).astype(np.int64)]
+    values = heights / tide_offsets.FEET_TO_METERS if units == 'Feet' else heights
+    preds = np.char.mod('%.2f', np.round(values, 2))
+    return dates, weekdays, clock, preds, types
+
+
+def _range_label(times):
+    first, last = times[[0, -1]].astype(object)
+    return f"{first:%Y%m%d %H:%M}", f"{last:%Y%m%d %H:%M}"
+
+
+def write_noaa_txt(path, station, times, heights, types):
+    """Write events in the NOAA text layout of HighTide/*.txt"""
+    begin, end = _range_label(times)
+    header = [
+        'NOAA/NOS/CO-OPS',
+        DISCLAIMER,
+        'Daily Tide Predictions',
+        f"StationName: {station['name']} ",
+        f"State: {station['state']} ",
+        f"Stationid: {station['id']}",
+    ]
+    reference = station.get('reference')
+    if reference:
+        offsets = station['offsets']
+        header += [
+            f"ReferencedToStationName: {reference['name']}",
+            f"ReferencedToStationId: {reference['id']}",
+            f"HeightOffsetLow: * {offsets['height_low']:.2f}",
+            f"HeightOffsetHigh: * {offsets['height_high']:.2f}",
+            f"TimeOffsetLow: {offsets['time_low']}",
+            f"TimeOffsetHigh: {offsets['time_high']}",
+            'Prediction Type: Subordinate',
+        ]
+    else:
+        header.append('Prediction Type: Harmonic')
+    header += [
+        f"From: {begin} - {end}",
+        f"Units: {station['units']}",
+        'Time Zone: LST_LDT',
+        'Datum: MLLW',
+        'Interval Type: High/Low',
+        '',
+        'Date \t\tDay\tTime\t\tPred\tHigh/Low',
+    ]
+    columns = _event_columns(times, heights, types, station['units'])
+    rows = ['\t'.join(row) for row in zip(*columns)]
+    with open(path, 'w', newline='') as f:
+        f.write('\r\n'.join(header + rows) + '\r\n')
+
+
+def write_noaa_xml(path, station, times, heights, types):
+    """Write events in the NOAA XML layout of HighTide/portJeff.xml"""
+    begin, end = _range_label(times)
+    reference = station.get('reference')
+    lines = [
+        '',
+        '\t<datainfo>',
+        '\t\t<origin>NOAA/NOS/CO-OPS</origin>',
+        '\t\t<disclaimer>',
+        f'\t\t{DISCLAIMER}',
+        '\t\t</disclaimer>',
+        '\t<datarange>Daily</datarange>',
+        '\t\t<producttype>Tide Prediction</producttype>',
+        f"\t\t<stationname>{station['name']}</stationname>",
+        f"\t\t<state>{station['state']}</state>",
+        f"\t\t<stationid>{station['id']}</stationid>",
+        '\t',
+    ]
+    if reference:
+        offsets = station['offsets']
+        lines += [
+            '\t\t<stationtype>Subordinate</stationtype>',
+            f"\t\t<referencedToStationName>{reference['name']}</referencedToStationName>",
+            f"\t\t<referencedToStationId>{reference['id']}</referencedToStationId>",
+            f"\t\t<HeightOffsetLow>* {offsets['height_low']:.2f}</HeightOffsetLow>",
+            f"\t\t<HeightOffsetHigh>* {offsets['height_high']:.2f}</HeightOffsetHigh>",
+            f"\t\t<TimeOffsetLow>{offsets['time_low']}</TimeOffsetLow>",
+            f"\t\t<TimeOffsetHigh>{offsets['time_high']}</TimeOffsetHigh>",
+        ]
+    else:
+        lines.append('\t\t<stationtype>Harmonic</stationtype>')
+    lines += [
+        '\t\t',
+        f'\t\t<BeginDate>{begin}</BeginDate>',
+        f'\t\t<EndDate>{end}</EndDate>',
+        '\t\t',
+        f"\t\t<dataUnits>{station['units']}</dataUnits>",
+        '\t\t ',
+        '\t<Timezone>LST_LDT</Timezone>',
+        '\t<Datum>MLLW</Datum>',
+        '\t<IntervalType>High/Low</IntervalType>',
+        '\t<data>',
+        '\t',
+    ]
+    item = ('\t\t\t<item>\n\t\t\t\t<date>{}</date>\n\t\t\t\t<day>{}</day>\n\t\t\n'
+            '\t\t\t\t<time>{}</time>\n\t\t\t\n\t\t\t\t<pred>{}</pred>\n\t\t\t\n'
+            '\t\t\t\t<highlow>{}</highlow>\n\t\t\t\n\t\t\t</item>\n\t\t')
+    columns = _event_columns(times, heights, types, station['units'])
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+        f.writelines(item.format(*row) + '\n' for row in zip(*columns))
+        f.write('\t\t</data>\n</datainfo>\n')
+
+
+def generate_dataset(output_dir, n_stations=10, start_year=2025, years=1, formats=('txt',),
+                     subordinate_fraction=0.3, seed=0):
+    """
+    Generate a synthetic NOAA dataset.
+
+    Harmonic stations get their own constituents; subordinate stations are derived
+    from a random harmonic station with NOAA-style time and height offsets. Units
+    alternate between Metric and Feet.
+
+    Returns the station registry that is also written to ``stations.json``:
+    {station_key: {'id', 'name', 'units', 'files': {format: path}, 'reference', 'offsets'}}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(f'{start_year}-01-01T00:00', 'm')
+    stop = np.datetime64(f'{start_year + years}-01-01T00:00', 'm')
+
+    n_subordinate = int(round(n_stations * subordinate_fraction)) if n_stations > 1 else 0
+    n_harmonic = n_stations - n_subordinate
+    registry = {}
+    reference_events = {}
+
+    for i in range(n_stations):
+        key = f'station{i:03d}'
+        station = {
+            'id': str(9000000 + i),
+            'name': f'Synthetic Station {i:03d}',
+            'state': 'NY',
+            'units': 'Metric' if i % 2 == 0 else 'Feet',
+        }
+        if i < n_harmonic:
+            events = tide_harmonics.predict_extremes(random_constituents(rng), start, stop)
+            reference_events[key] = events
+        else:
+            reference_key = f'station{rng.integers(n_harmonic):03d}'
+            reference = registry[reference_key]
+            station['reference'] = {'key': reference_key, 'id': reference['id'], 'name': reference['name']}
+            station['offsets'] = {
+                'time_high': int(rng.integers(-60, 121)),
+                'time_low': int(rng.integers(-60, 121)),
+                'height_high': round(float(rng.uniform(0.8, 1.2)), 2),
+                'height_low': round(float(rng.uniform(0.8, 1.2)), 2),
+            }
+            offsets = station['offsets']
+            events = tide_offsets.apply_offsets(*reference_events[reference_key], {
+                'time_high': offsets['time_high'],
+                'time_low': offsets['time_low'],
+                'height_high': ('*', offsets['height_high']),
+                'height_low': ('*', offsets['height_low']),
+            })
+
+        station['files'] = {}
+        for fmt in formats:
+            path = os.path.join(output_dir, f'{key}.{fmt}')
+            writer = write_noaa_xml if fmt == 'xml' else write_noaa_txt
+            writer(path, station, *events)
+            station['files'][fmt] = path
+        registry[key] = station
+
+    with open(os.path.join(output_dir, 'stations.json'), 'w') as f:
+        json.dump(registry, f, indent=2)
+    return registry
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.description = "Generate synthetic NOAA High/Low tide prediction files for scale testing."
+    parser.add_argument('output_dir', help='Directory to write the files and stations.json to')
+    parser.add_argument('--stations', type=int, default=10, help='Number of stations')
+    parser.add_argument('--start-year', type=int, default=2025, help='First year of predictions')
+    parser.add_argument('--years', type=int, default=1, help='Number of years per station')
+    parser.add_argument('--formats', nargs='+', choices=['txt', 'xml'], default=['txt'], help='File formats to write')
+    parser.add_argument('--subordinate-fraction', type=float, default=0.3, help='Share of subordinate stations')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+    registry = generate_dataset(args.output_dir, args.stations, args.start_year, args.years,
+                                args.formats, args.subordinate_fraction, args.seed)
+    print(f"✅ Wrote {len(registry)} stations to {args.output_dir}")
@@ -0,0 +1,63 @@
+"""
+Gunicorn settings for production serving, configurable through environment variables:
+
+    WEB_CONCURRENCY      worker processes (default: 2 x CPUs + 1)
+    GUNICORN_THREADS     threads per worker (default: 4); > 1 uses the gthread worker
+    GUNICORN_KEEPALIVE   seconds to keep idle connections open (default: 5)
+    GUNICORN_TIMEOUT     seconds before a silent worker is restarted (default: 60)
+    GUNICORN_MAX_REQUESTS  recycle workers after this many requests (default: 0, never)
+    BIND                 address to listen on (default: 0.0.0.0:5001)
+    METRICS_DIR, PROFILE_DIR  where workers share /metrics and /debug/profiles data
+                         (default: per-server directories under the system temp dir)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.getenv('BIND', '0.0.0.0:5001')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Import wsgi.py (and its preloaded data) once in the master, then fork
+preload_app = True
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+
+# Workers write metric snapshots and profiles here so any worker's /metrics and
+# /debug/profiles cover all of them; set before the app (and metrics.py) is imported
+_shared_root = os.path.join(tempfile.gettempdir(), f'floodrisk-{os.getpid()}')
+os.environ.setdefault('METRICS_DIR', os.path.join(_shared_root, 'metrics'))
+os.environ.setdefault('PROFILE_DIR', os.path.join(_shared_root, 'profiles'))
+
+
+def on_starting(server):
+    # Start from empty shared directories so old snapshots are not merged in
+    for name in ('METRICS_DIR', 'PROFILE_DIR'):
+        shutil.rmtree(os.environ[name], ignore_errors=True)
+        os.makedirs(os.environ[name], exist_ok=True)
+
+
+def on_exit(server):
+    shutil.rmtree(_shared_root, ignore_errors=True)
+
+
+def child_exit(server, worker):
+    # Counters of an exited worker keep counting in /metrics; its in-flight gauge does not
+    import metrics
+    metrics.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Threads are not inherited across fork, so each worker warms its own backends
+    if os.getenv('WARMUP_WORKERS', '1') != '0':
+        import warmup
+        warmup.start()
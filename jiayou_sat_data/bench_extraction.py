@@ -0,0 +1,112 @@
+"""
+Throughput benchmark for satellite station extraction.
+
+Modes:
+    serial    one station at a time, every file opened per station (read_one_satellite_data)
+    batched   each file opened once for all stations (extract_points)
+    parallel  batched, with the files spread over a process pool
+
+Each mode runs in a fresh process so its peak RSS is measured on its own.
+
+    python synthetic_archive.py /tmp/monthly_raw --months 24
+    python bench_extraction.py /tmp/monthly_raw --stations 50 --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import pathlib
+import time
+
+sys.path.append(os.path.join(pathlib.Path(__file__).parent.resolve()))
+
+from synthetic_archive import ocean_points
+
+MODES = ('serial', 'batched', 'parallel')
+
+
+def _peak_rss_mb():
+    """
+    (this process, largest finished child) peak RSS in MB. ru_maxrss of RUSAGE_CHILDREN
+    is the largest child's peak, so the two are reported separately, not summed.
+    """
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+
+def run_mode(mode, files, lats, lons, workers, queue):
+    os.environ.setdefault('TQDM_DISABLE', '1')
+    from sa_data import extract_points, read_one_satellite_data
+
+    started = time.perf_counter()
+    if mode == 'serial':
+        for lat, lon in zip(lats, lons):
+            for file in files:
+                read_one_satellite_data(file, lat=lat, lon=lon).item()
+        file_opens = len(files) * len(lats)
+    else:
+        extract_points(files, lats, lons, workers=workers if mode == 'parallel' else 1)
+        file_opens = len(files)
+    elapsed = time.perf_counter() - started
+
+    peak_mb, child_peak_mb = _peak_rss_mb()
+    queue.put({
+        'mode': mode,
+        'files': len(files),
+        'stations': len(lats),
+        'file_opens': file_opens,
+        'seconds': elapsed,
+        'files_per_second': len(files) / elapsed,
+        'stations_per_second': len(lats) / elapsed,
+        'peak_rss_mb': peak_mb,
+        'child_peak_rss_mb': child_peak_mb,
+    })
+
+
+def benchmark(archive_dir, n_stations=20, modes=MODES, workers=4, seed=0, resolution=0.25):
+    """Run each mode in its own process and return their results"""
+    from sa_data import list_files
+
+    files = list_files(archive_dir, 'nc')
+    lats, lons = ocean_points(n_stations, resolution=resolution, seed=seed)
+    lats, lons = lats.tolist(), lons.tolist()
+
+    ctx = mp.get_context('spawn')
+    results = []
+    for mode in modes:
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_mode, args=(mode, files, lats, lons, workers, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.description = "Measure files/sec, stations/sec and peak RSS of the satellite extraction modes."
+    parser.add_argument('archive_dir', help='Directory of monthly NetCDF files (see synthetic_archive.py)')
+    parser.add_argument('--stations', type=int, default=20, help='Number of random ocean stations')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='Modes to run')
+    parser.add_argument('--workers', type=int, default=4, help='Processes for the parallel mode')
+    parser.add_argument('--resolution', type=float, default=0.25, help='Grid resolution of the archive')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the station points')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = benchmark(args.archive_dir, args.stations, args.modes, args.workers, args.seed, args.resolution)
+
+    print(f"{'mode':<10}{'files':>7}{'stations':>10}{'seconds':>10}{'files/s':>10}{'stations/s':>12}"
+          f"{'peak MB':>10}{'child MB':>10}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['files']:>7}{r['stations']:>10}{r['seconds']:>10.2f}"
+              f"{r['files_per_second']:>10.1f}{r['stations_per_second']:>12.1f}"
+              f"{r['peak_rss_mb']:>10.0f}{r['child_peak_rss_mb']:>10.0f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -8,9 +8,12 @@ import numpy as np
 
 import sys
 import pathlib
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 sys.path.append(os.path.join(pathlib.Path(__file__).parent.resolve()))
 
-import ar6
+from station_store import StationStore, FileManifest, DEFAULT_STORE_DIR
 
 def list_files(folder_path, extension='*', recursive=False, full_path=True, **kwargs):
     if extension == '*':
@@ -71,23 +74,200 @@ def read_satellite_data(lat, lon, return_dataframe=True,
             result.to_csv(save_path, index=False)
     return result
 
-def read_satellite_data_station(station_name: int|str, save_dir="data/satellite/processed", from_file: bool = True, **kwargs):
+def resolve_station_id(station_name: int|str) -> int:
     try:
-        station_id = int(station_name)
+        return int(station_name)
     except ValueError:
+        # ar6 (station catalogue) is only needed for names and locations, not for extraction
+        import ar6
         if station_name in ar6.station_loc_id_map:
-            station_id = ar6.station_loc_id_map[station_name]
-        else:
-            station_id = ar6.get_ar6_station_id(station_name)
-            
-    save_path = os.path.join(save_dir, f"{station_id}.csv")
-    os.makedirs(save_dir, exist_ok=True)
-
-    if from_file and os.path.exists(save_path):
-        return pd.read_csv(save_path)
-    latlon = ar6.station2lonlat(station_id)
-    lat, lon = latlon['lat'], latlon['lon']
-    return read_satellite_data(lat=lat, lon=lon, save_path=save_path, **kwargs)
+            return ar6.station_loc_id_map[station_name]
+        return ar6.get_ar6_station_id(station_name)
+
+def locate_grid_cells(data, lats, lons):
+    """
+    Vectorized version of the lat_bnds/lon_bnds search in read_one_satellite_data.
+    Returns (lat_idx, lon_idx) arrays for the given points.
+    """
+    lats = np.atleast_1d(np.asarray(lats, dtype=float))
+    lons = np.atleast_1d(np.asarray(lons, dtype=float))
+    lons = np.where(lons < 0, lons + 360, lons)
+    lat_bnds = data['lat_bnds'].values
+    lon_bnds = data['lon_bnds'].values
+    in_lat = ((lats[:, None] >= lat_bnds.min(axis=1)) & (lats[:, None] <= lat_bnds.max(axis=1)))
+    in_lon = ((lons[:, None] >= lon_bnds.min(axis=1)) & (lons[:, None] <= lon_bnds.max(axis=1)))
+    if not (in_lat.any(axis=1).all() and in_lon.any(axis=1).all()):
+        raise ValueError("Point outside of the satellite grid")
+    return in_lat.argmax(axis=1), in_lon.argmax(axis=1)
+
+def read_satellite_points(file_path, lats, lons):
+    """
+    Read the sla of many points from one file with a single open.
+    Returns (date string, values array aligned with lats/lons).
+    """
+    with xr.open_dataset(file_path) as data:
+        lat_idx, lon_idx = locate_grid_cells(data, lats, lons)
+        values = data['sla'][0].values[lat_idx, lon_idx]
+        date = pd.to_datetime(data['time'].values[0]).strftime('%Y-%m-%d')
+    return date, values
+
+def extract_points(files, lats, lons, workers=1):
+    """
+    Read many points from many files, opening each file once.
+    Returns (dates, values) with values shaped (len(files), len(points)).
+    With workers > 1 the files are spread over a process pool.
+    """
+    if not files:
+        return [], np.empty((0, len(lats)))
+    if workers > 1:
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(tqdm(pool.map(read_satellite_points, files, repeat(lats), repeat(lons),
+                                         chunksize=chunksize), total=len(files)))
+    else:
+        results = [read_satellite_points(file, lats, lons) for file in tqdm(files)]
+    dates = [date for date, _ in results]
+    return dates, np.vstack([values for _, values in results])
+
+def file_fingerprint(file_path, with_hash=True):
+    stat = os.stat(file_path)
+    fingerprint = {'size': stat.st_size, 'mtime': stat.st_mtime}
+    if with_hash:
+        sha1 = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(block)
+        fingerprint['sha1'] = sha1.hexdigest()
+    return fingerprint
+
+def is_folded(file_path, folded, fingerprints):
+    """
+    Check a source file against a station's manifest entries. Size and mtime are
+    compared first; the hash is only computed when they changed.
+    """
+    entry = folded.get(os.path.basename(file_path))
+    if entry is None:
+        return False
+    quick = file_fingerprint(file_path, with_hash=False)
+    if quick['size'] == entry['size'] and quick['mtime'] == entry['mtime']:
+        return True
+    if file_path not in fingerprints:
+        fingerprints[file_path] = file_fingerprint(file_path)
+    return fingerprints[file_path]['sha1'] == entry.get('sha1')
+
+def file_date(file_path):
+    """Date of a monthly file, read from its time coordinate without loading sla"""
+    with xr.open_dataset(file_path) as data:
+        return pd.to_datetime(data['time'].values[0]).strftime('%Y-%m-%d')
+
+def seed_manifest(manifest, station_id, dates, files, file_dates, fingerprints):
+    """
+    Record the files whose dates are already in a station's series, for stations
+    stored before the manifest existed or imported from a per-station CSV.
+    `file_dates` and `fingerprints` cache the per-file lookups across stations.
+    """
+    dates = set(pd.to_datetime(np.asarray(dates)).strftime('%Y-%m-%d'))
+    folded = {}
+    for file in files:
+        if file not in file_dates:
+            file_dates[file] = file_date(file)
+        if file_dates[file] in dates:
+            if file not in fingerprints:
+                fingerprints[file] = file_fingerprint(file)
+            folded[os.path.basename(file)] = fingerprints[file]
+    manifest.record(station_id, folded)
+
+def update_stations(station_names, save_dir=DEFAULT_STORE_DIR, full=False, workers=1):
+    """
+    Fold monthly satellite files into the station store.
+
+    Only files missing from each station's manifest are read (all files when
+    `full` is True), and each file is opened once for all the stations that
+    need it. `workers` > 1 reads the files in a process pool.
+    """
+    files = list_satellite_files()
+    store = StationStore(save_dir)
+    manifest = FileManifest(save_dir)
+    station_ids = list(dict.fromkeys(resolve_station_id(s) for s in station_names))
+
+    fingerprints = {}
+    if not full:
+        # Stations stored before the manifest existed: their filled months are already folded
+        file_dates = {}
+        for station_id in station_ids:
+            if station_id in store and station_id not in manifest.stations:
+                row = store.series(station_id)
+                seed_manifest(manifest, station_id, store.months[np.isfinite(row)], files, file_dates, fingerprints)
+
+    pending = {}
+    for station_id in station_ids:
+        folded = {} if full else manifest.folded(station_id)
+        pending[station_id] = [f for f in files if not is_folded(f, folded, fingerprints)]
+
+    # Invert to file -> stations so every file is read once
+    by_file = {}
+    for station_id, station_files in pending.items():
+        for file in station_files:
+            by_file.setdefault(file, []).append(station_id)
+
+    points = {}
+    for station_id in station_ids:
+        if pending[station_id]:
+            import ar6
+            latlon = ar6.station2lonlat(station_id)
+            points[station_id] = (latlon['lat'], latlon['lon'])
+
+    # Files needed by the same stations are extracted together
+    groups = {}
+    for file, file_stations in by_file.items():
+        groups.setdefault(tuple(file_stations), []).append(file)
+
+    results = {station_id: ([], []) for station_id in station_ids}
+    for group_stations, group_files in groups.items():
+        lats = [points[s][0] for s in group_stations]
+        lons = [points[s][1] for s in group_stations]
+        dates, values = extract_points(sorted(group_files), lats, lons, workers=workers)
+        for column, station_id in enumerate(group_stations):
+            results[station_id][0].extend(dates)
+            results[station_id][1].extend(values[:, column])
+
+    for file in by_file:
+        if file not in fingerprints:
+            fingerprints[file] = file_fingerprint(file)
+
+    # One store write for the whole batch, so adding N stations rewrites the matrix once
+    store.write_stations({station_id: results[station_id] for station_id in station_ids
+                          if results[station_id][0] or full or station_id not in store}, replace=full)
+    for station_id in station_ids:
+        manifest.record(
+            station_id,
+            {os.path.basename(f): fingerprints[f] for f in pending[station_id]},
+            replace=full
+        )
+    manifest.save()
+    return store
+
+def read_satellite_data_station(station_name: int|str, save_dir=DEFAULT_STORE_DIR, from_file: bool = True):
+    """
+    Return the station's monthly sla series from the columnar StationStore.
+    With `from_file` only newly arrived monthly files are folded in; otherwise
+    the station is recomputed from all files.
+    """
+    station_id = resolve_station_id(station_name)
+    store = StationStore(save_dir)
+
+    if from_file and station_id not in store:
+        # Fold a per-station CSV from the old layout into the store
+        legacy_path = os.path.join(save_dir, f"{station_id}.csv")
+        if os.path.exists(legacy_path):
+            legacy = pd.read_csv(legacy_path)
+            store.write_station(station_id, legacy['date'], legacy['sla'])
+            manifest = FileManifest(save_dir)
+            seed_manifest(manifest, station_id, legacy['date'], list_satellite_files(), {}, {})
+            manifest.save()
+
+    store = update_stations([station_id], save_dir=save_dir, full=not from_file)
+    return store.read_station(station_id)
 
 if __name__ == '__main__':
     # ar6list = ar6.read_ar6_location_list().iloc[:1050]
@@ -98,11 +278,10 @@ if __name__ == '__main__':
     #     read_satellite_data_station(station_id, from_file=True)
     import argparse
     parser = argparse.ArgumentParser()
-    parser.description = "This script reads and processes satellite data and save them to 'data/satellite/processed'."
+    parser.description = "This script reads and processes satellite data and save them to the station store in 'data/satellite/processed'."
     parser.add_argument('station_ids', type=str, nargs='+', help='One or more station IDs for sea level analysis')
-    parser.add_argument('-u', '--update', action='store_true', help='Update the files.')
+    parser.add_argument('-u', '--update', action='store_true', help='Recompute the stations from all files instead of only new ones.')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='Number of processes reading files in parallel.')
     args = parser.parse_args()
-    from_file = not args.update
-    for station_id in args.station_ids:
-        read_satellite_data_station(station_id, from_file=from_file)
+    update_stations(args.station_ids, full=args.update, workers=args.workers)
     
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Columnar store for processed satellite station series.
+
+All processed stations live in one directory (default ``data/satellite/processed``):
+
+    sla.npy        float64 matrix, stations x months (NaN where no value)
+    months.npy     datetime64[D] month labels for the matrix columns, sorted
+    stations.json  station id -> matrix row
+    manifest.json  station id -> source files folded into its row
+
+The matrix is opened with ``np.load(mmap_mode=...)`` so reading one station is a
+row view into the page cache instead of a CSV parse.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_DIR = "data/satellite/processed"
+
+
+def _atomic_save(path, array):
+    """Write a .npy file next to its final name and move it into place"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _atomic_dump_json(path, obj):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class StationStore:
+    """
+    Stations x months matrix of sea level anomaly with a station index.
+
+    Rows are appended for new stations and columns are merged in for new months;
+    updating an existing station over known months is written in place.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self.sla_path = os.path.join(root, 'sla.npy')
+        self.months_path = os.path.join(root, 'months.npy')
+        self.index_path = os.path.join(root, 'stations.json')
+        self.reload()
+
+    def reload(self):
+        """(Re)open the matrix and index from disk"""
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = {int(k): v for k, v in json.load(f).items()}
+            self.months = np.load(self.months_path)
+            self._sla = np.load(self.sla_path, mmap_mode='r')
+        else:
+            self.index = {}
+            self.months = np.array([], dtype='datetime64[D]')
+            self._sla = np.empty((0, 0), dtype=np.float64)
+
+    def __contains__(self, station_id):
+        return int(station_id) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def station_ids(self):
+        return sorted(self.index, key=self.index.get)
+
+    def series(self, station_id):
+        """Return one station's values as a read-only view of the matrix row"""
+        return self._sla[self.index[int(station_id)]]
+
+    def series_many(self, station_ids):
+        """Return {station_id: row view} for the stations present in the store"""
+        return {int(s): self.series(s) for s in station_ids if s in self}
+
+    def read_station(self, station_id):
+        """Return a station as a DataFrame with ``date`` and ``sla`` columns (no copy)"""
+        return pd.DataFrame({'date': self.months, 'sla': self.series(station_id)}, copy=False)
+
+    def read_stations(self, station_ids):
+        """Return {station_id: DataFrame} for the stations present in the store"""
+        return {s: pd.DataFrame({'date': self.months, 'sla': row}, copy=False)
+                for s, row in self.series_many(station_ids).items()}
+
+    def write_station(self, station_id, dates, values, replace=False):
+        """
+        Insert or update a station's series.
+
+        Args:
+            station_id: Integer station id
+            dates: Month dates of the values (anything ``np.datetime64`` accepts)
+            values: Sea level anomaly values aligned with ``dates``
+            replace: Clear the station's existing values before writing
+        """
+        self.write_stations({station_id: (dates, values)}, replace=replace)
+
+    def write_stations(self, series, replace=False):
+        """
+        Insert or update many stations with at most one rewrite of the matrix.
+
+        Args:
+            series: {station_id: (dates, values)} as for ``write_station``
+            replace: Clear each written station's existing values before writing
+        """
+        series = {int(s): (np.asarray(dates, dtype='datetime64[D]'), np.asarray(values, dtype=np.float64))
+                  for s, (dates, values) in series.items()}
+        if not series:
+            return
+
+        months = np.unique(np.concatenate([self.months] + [dates for dates, _ in series.values()]))
+        new_stations = [s for s in series if s not in self.index]
+        reshape = bool(new_stations) or len(months) != len(self.months)
+        if reshape:
+            # Shape changes: rebuild the matrix with the merged axes once for the whole batch
+            index = dict(self.index)
+            for station_id in new_stations:
+                index[station_id] = len(index)
+            sla = np.full((len(index), len(months)), np.nan)
+            if self._sla.size:
+                sla[:self._sla.shape[0], np.searchsorted(months, self.months)] = self._sla
+        else:
+            index = self.index
+            sla = np.load(self.sla_path, mmap_mode='r+')
+
+        for station_id, (dates, values) in series.items():
+            if replace:
+                sla[index[station_id]] = np.nan
+            sla[index[station_id], np.searchsorted(months, dates)] = values
+
+        if reshape:
+            self._save(sla, months, index)
+        else:
+            sla.flush()
+            del sla
+
+    def _save(self, sla, months, index):
+        os.makedirs(self.root, exist_ok=True)
+        _atomic_save(self.sla_path, sla)
+        _atomic_save(self.months_path, months)
+        _atomic_dump_json(self.index_path, {str(k): v for k, v in index.items()})
+        self.reload()
+
+
+class FileManifest:
+    """
+    Source files folded into each station's row, keyed by file name with the
+    size, mtime and sha1 they had when they were read.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self.path = os.path.join(root, 'manifest.json')
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.stations = {int(k): v for k, v in json.load(f).items()}
+        else:
+            self.stations = {}
+
+    def folded(self, station_id):
+        """Return {file_name: fingerprint} for the files folded into a station"""
+        return self.stations.get(int(station_id), {})
+
+    def record(self, station_id, fingerprints, replace=False):
+        """Mark files as folded into a station"""
+        station_id = int(station_id)
+        if replace or station_id not in self.stations:
+            self.stations[station_id] = {}
+        self.stations[station_id].update(fingerprints)
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        _atomic_dump_json(self.path, {str(k): v for k, v in self.stations.items()})
@@ -0,0 +1,95 @@
+"""
+Synthetic monthly satellite archive for benchmarking.
+
+Writes NetCDF files with the variables sa_data.py reads from the real
+monthly_raw/ archive: `sla` (time, lat, lon), `lat_bnds`, `lon_bnds` and `time`,
+on the same 0.25 degree global grid by default. Land cells are NaN.
+
+    python synthetic_archive.py data/satellite/monthly_raw --months 168
+"""
+
+import argparse
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+def grid(resolution=0.25):
+    """Cell centers and bounds; lat_bnds are (upper, lower) and lon_bnds (lower, upper)"""
+    lats = np.arange(-90 + resolution / 2, 90, resolution)
+    lons = np.arange(resolution / 2, 360, resolution)
+    lat_bnds = np.stack([lats + resolution / 2, lats - resolution / 2], axis=1)
+    lon_bnds = np.stack([lons - resolution / 2, lons + resolution / 2], axis=1)
+    return lats, lons, lat_bnds, lon_bnds
+
+
+def land_mask(lats, lons):
+    """Smooth pseudo-continents covering roughly 30% of the grid"""
+    lat_r = np.radians(lats)[:, None]
+    lon_r = np.radians(lons)[None, :]
+    field = np.sin(2 * lon_r) * np.cos(3 * lat_r) + 0.5 * np.cos(5 * lon_r + 1) * np.sin(2 * lat_r)
+    return field > 0.55
+
+
+def write_month(path, month, lats, lons, lat_bnds, lon_bnds, land, rng):
+    """Write one monthly file with a seasonal signal plus noise"""
+    lat_r = np.radians(lats)[:, None]
+    lon_r = np.radians(lons)[None, :]
+    season = np.cos(2 * np.pi * (month.month - 3) / 12)
+    sla = (0.05 * season * np.sin(lat_r) + 0.03 * np.cos(3 * lon_r) * np.cos(lat_r)
+           + 0.01 * rng.standard_normal((len(lats), len(lons))))
+    sla = np.where(land, np.nan, sla).astype(np.float32)
+    ds = xr.Dataset(
+        {
+            'sla': (('time', 'lat', 'lon'), sla[np.newaxis]),
+            'lat_bnds': (('lat', 'nv'), lat_bnds),
+            'lon_bnds': (('lon', 'nv'), lon_bnds),
+        },
+        coords={'time': [month.to_datetime64()], 'lat': lats, 'lon': lons},
+    )
+    encoding = None
+    if importlib.util.find_spec('netCDF4') is not None:
+        encoding = {'sla': {'zlib': True, 'complevel': 4}}
+    ds.to_netcdf(path, encoding=encoding)
+
+
+def generate_archive(output_dir, months=168, start='2010-01-01', resolution=0.25, seed=0):
+    """Write `months` monthly files starting at `start` and return their paths"""
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    lats, lons, lat_bnds, lon_bnds = grid(resolution)
+    land = land_mask(lats, lons)
+    paths = []
+    for month in pd.date_range(start, periods=months, freq='MS'):
+        path = os.path.join(output_dir, f"sla_{month:%Y%m}.nc")
+        write_month(path, month, lats, lons, lat_bnds, lon_bnds, land, rng)
+        paths.append(path)
+    return paths
+
+
+def ocean_points(n, resolution=0.25, seed=0):
+    """Random (lat, lon) points on ocean cells, for use as benchmark stations"""
+    rng = np.random.default_rng(seed)
+    lats, lons, _, _ = grid(resolution)
+    allowed = ~land_mask(lats, lons) & (np.abs(lats) < 70)[:, None]
+    lat_idx, lon_idx = np.nonzero(allowed)
+    pick = rng.choice(len(lat_idx), size=n, replace=False)
+    point_lons = lons[lon_idx[pick]]
+    # Stations use -180..180 like the ar6 locations
+    return lats[lat_idx[pick]], np.where(point_lons > 180, point_lons - 360, point_lons)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.description = "Generate a synthetic monthly_raw/ satellite archive for benchmarking."
+    parser.add_argument('output_dir', help='Directory to write the NetCDF files to')
+    parser.add_argument('--months', type=int, default=168, help='Number of monthly files (168 = 2010-2023)')
+    parser.add_argument('--start', default='2010-01-01', help='First month')
+    parser.add_argument('--resolution', type=float, default=0.25, help='Grid resolution in degrees')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+    paths = generate_archive(args.output_dir, args.months, args.start, args.resolution, args.seed)
+    print(f"✅ Wrote {len(paths)} files to {args.output_dir}")
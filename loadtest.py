@@ -0,0 +1,164 @@
+"""
+Closed-loop load test for the Flask app.
+
+Each simulated user keeps one keep-alive connection open and requests the paths
+in turn for --duration seconds. Reports throughput and latency percentiles,
+overall and per path.
+
+Against a running server:
+    python loadtest.py --url http://127.0.0.1:5001 --users 32 --duration 30
+
+Or let it start a local server with the stub tile backend (no Earth Engine or
+OpenAI calls), either under gunicorn or the Flask development server:
+    python loadtest.py --spawn gunicorn --users 32
+    python loadtest.py --spawn flask-dev --users 32
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+# The bundled HighTide/ files cover June 2025
+DEFAULT_PATHS = [
+    '/api/port-jefferson-tides?date=2025-06-15',
+    '/api/miami-tides?date=2025-06-15',
+    '/api/nyc-tides?from_date=2025-06-01&to_date=2025-06-30',
+]
+MAP_PATH = '/?level=2.0'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(kind, port):
+    """Start gunicorn or the Flask dev server on port with the stub tile backend"""
+    env = dict(os.environ, FLOOD_TILE_BACKEND='stub', WARMUP='0', WARMUP_WORKERS='0',
+               BIND=f'127.0.0.1:{port}', GUNICORN_ACCESSLOG='/dev/null')
+    env.pop('OPENAI_API_KEY', None)
+    if kind == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    else:
+        command = [sys.executable, '-c', f'from app import app; app.run(port={port}, threaded=True)']
+    process = subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{kind} server exited with code {process.returncode}')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{kind} server did not start within 60 s')
+
+
+def _user(host, port, paths, stop_at, results, offset):
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    i = offset
+    while time.monotonic() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 500
+        except (OSError, http.client.HTTPException):
+            ok = False
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+        results.append((path, time.perf_counter() - started, ok))
+    connection.close()
+
+
+def run(url, paths, users=16, duration=20.0):
+    """Run the load and return a summary dict with overall and per-path statistics"""
+    parsed = urllib.parse.urlsplit(url)
+    stop_at = time.monotonic() + duration
+    per_user = [[] for _ in range(users)]
+    threads = [threading.Thread(target=_user, args=(parsed.hostname, parsed.port or 80, paths,
+                                                    stop_at, per_user[i], i))
+               for i in range(users)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = [r for user_results in per_user for r in user_results]
+    summary = {'users': users, 'seconds': elapsed, 'paths': {}}
+    summary.update(_stats([r for r in results], elapsed))
+    for path in paths:
+        summary['paths'][path] = _stats([r for r in results if r[0] == path], elapsed)
+    return summary
+
+
+def _stats(results, elapsed):
+    latencies = np.array([r[1] for r in results]) * 1000
+    errors = sum(1 for r in results if not r[2])
+    if len(latencies) == 0:
+        return {'requests': 0, 'errors': 0, 'rps': 0.0}
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'rps': len(results) / elapsed,
+        'p50_ms': p50,
+        'p90_ms': p90,
+        'p99_ms': p99,
+        'max_ms': latencies.max(),
+    }
+
+
+def print_summary(summary):
+    print(f"{summary['users']} users, {summary['seconds']:.1f} s")
+    print(f"{'path':<60}{'requests':>9}{'errors':>7}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}")
+    rows = list(summary['paths'].items()) + [('total', summary)]
+    for path, s in rows:
+        if not s['requests']:
+            print(f"{path:<60}{0:>9}")
+            continue
+        print(f"{path:<60}{s['requests']:>9}{s['errors']:>7}{s['rps']:>9.1f}"
+              f"{s['p50_ms']:>9.1f}{s['p90_ms']:>9.1f}{s['p99_ms']:>9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.description = "Load test the tide API and map routes with concurrent keep-alive users."
+    parser.add_argument('--url', default='http://127.0.0.1:5001', help='Server to test (ignored with --spawn)')
+    parser.add_argument('--spawn', choices=['gunicorn', 'flask-dev'], help='Start a local stub-backend server')
+    parser.add_argument('--users', type=int, default=16, help='Concurrent users')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to run')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS, help='Paths to request in turn')
+    parser.add_argument('--with-map', action='store_true', help='Also request the map page (needs folium)')
+    args = parser.parse_args()
+
+    paths = args.paths + ([MAP_PATH] if args.with_map else [])
+    server = None
+    url = args.url
+    if args.spawn:
+        port = _free_port()
+        server = spawn_server(args.spawn, port)
+        url = f'http://127.0.0.1:{port}'
+    try:
+        print_summary(run(url, paths, args.users, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
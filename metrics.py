@@ -0,0 +1,283 @@
+"""
+Request and stage metrics in Prometheus text format.
+
+Dependency-free so the parser and map modules can time their stages without
+pulling in Flask. The Flask app registers the middleware and /metrics with
+init_app(app).
+
+Under a multi-process server set METRICS_DIR (gunicorn.conf.py does): every worker
+then writes a snapshot of its metrics to METRICS_DIR/<pid>.json every
+METRICS_FLUSH_SECONDS, and /metrics merges all snapshots, so a scrape covers every
+worker and counters of exited workers are kept. Gauges of exited workers are dropped
+by mark_process_dead(pid).
+
+    with stage('ee_getmapid'):
+        map_id_dict = image.getMapId(vis_params)
+
+    @timed_stage('tide_parse')
+    def parse_tide_data(station): ...
+"""
+
+import atexit
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers sub-millisecond parser stages up to slow Earth Engine / OpenAI calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+# Shared snapshot directory for multi-process servers (None: this process only)
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '1'))
+_flusher_pid = None
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, value in sorted(self.items() if values is None else values.items()):
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _merge(self, a, b):
+        return a + b
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {value}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            counts, total, n = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def _merge(self, a, b):
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]
+
+    def _render_value(self, key, value):
+        counts, total, n = value
+        lines = []
+        for bound, count in zip(self.buckets, counts):
+            labels = _format_labels(self.labelnames, key, [('le', repr(float(bound)))])
+            lines.append(f'{self.name}_bucket{labels} {count}')
+        lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", "+Inf")])} {n}')
+        lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {total}')
+        lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {n}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency by route',
+                            ('method', 'route', 'status'))
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests currently being handled')
+REQUESTS_TOTAL = Counter('http_requests_total', 'Requests by route and status code',
+                         ('method', 'route', 'status'))
+STAGE_LATENCY = Histogram('app_stage_duration_seconds',
+                          'Time spent in a processing stage or remote call (nested stages are inclusive)',
+                          ('stage',))
+ERRORS_TOTAL = Counter('app_errors_total', 'Errors caught and reported by the app', ('source',))
+
+
+@contextmanager
+def stage(name):
+    """Time a block as a named stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - started, stage=name)
+
+
+def timed_stage(name):
+    """Decorator form of stage()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f'{pid}.json')
+
+
+def flush():
+    """Write this process's metrics to its METRICS_DIR snapshot (no-op without METRICS_DIR)"""
+    if not METRICS_DIR:
+        return
+    snapshot = {m.name: [[list(key), value] for key, value in m.items()] for m in _registry}
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = _snapshot_path(os.getpid())
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        try:
+            flush()
+        except OSError as e:
+            print(f"⚠️ Could not write metrics snapshot: {e}")
+
+
+def start_flusher():
+    """Flush every FLUSH_SECONDS from a daemon thread; once per process, so it also runs after fork"""
+    global _flusher_pid
+    if not METRICS_DIR or _flusher_pid == os.getpid():
+        return
+    _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+    atexit.register(flush)
+
+
+def mark_process_dead(pid):
+    """Drop the gauges of an exited worker from its snapshot; its counters and histograms stay"""
+    if not METRICS_DIR:
+        return
+    path = _snapshot_path(pid)
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    for metric in _registry:
+        if metric.kind == 'gauge':
+            snapshot.pop(metric.name, None)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _merged_values():
+    """{metric name: {label key: value}} summed over every process snapshot in METRICS_DIR"""
+    flush()
+    merged = {m.name: {} for m in _registry}
+    metrics = {m.name: m for m in _registry}
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, items in snapshot.items():
+            if name not in metrics:
+                continue
+            values = merged[name]
+            for key, value in items:
+                key = tuple(key)
+                values[key] = metrics[name]._merge(values[key], value) if key in values else value
+    return merged
+
+
+def render_metrics():
+    """All registered metrics in Prometheus text exposition format (all workers with METRICS_DIR)"""
+    merged = _merged_values() if METRICS_DIR else {}
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render(merged.get(metric.name)))
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Record per-route latency, status codes and in-flight requests, and serve /metrics"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        start_flusher()
+        g._metrics_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            labels = {'method': request.method, 'route': route, 'status': response.status_code}
+            REQUEST_LATENCY.observe(time.perf_counter() - started, **labels)
+            REQUESTS_TOTAL.inc(**labels)
+            g._metrics_recorded = True
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        REQUESTS_IN_FLIGHT.dec()
+        if exc is not None and not g.pop('_metrics_recorded', False):
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUESTS_TOTAL.inc(method=request.method, route=route, status=500)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
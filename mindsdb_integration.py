@@ -18,8 +18,9 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import local modules
-from tide_data_parser import parse_tide_data
-from jiayou_sat_data.sa_data import read_satellite_data_station
+from tide_data_parser import station_keys, tide_dataframe
+from jiayou_sat_data.sa_data import read_satellite_data_station, resolve_station_id, StationStore
+from data_sinks import MindsDBSink
 
 try:
     import mindsdb
@@ -30,6 +31,97 @@ except ImportError:
     print("MindsDB not installed. Installing...")
     MINDSDB_AVAILABLE = False
 
+def _grid_coords(ds, sla):
+    """Return the lat/lon values of the sla grid, from coordinates or cell bounds"""
+    lat_dim, lon_dim = sla.dims[-2], sla.dims[-1]
+    if lat_dim in ds.coords:
+        lats = ds[lat_dim].values
+    else:
+        lats = ds['lat_bnds'].values.mean(axis=1)
+    if lon_dim in ds.coords:
+        lons = ds[lon_dim].values
+    else:
+        lons = ds['lon_bnds'].values.mean(axis=1)
+    return lat_dim, lon_dim, np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+
+def iter_satellite_batches(nc_files, bbox=None, coastal_mask=None, time_chunk=12, lat_block=90):
+    """
+    Stream every valid sea level anomaly value from NetCDF files as DataFrame batches.
+    
+    Each file is read in (time, latitude block) chunks so memory stays bounded by
+    time_chunk x lat_block x n_lon values, and NaNs are dropped per chunk.
+    
+    Args:
+        nc_files: NetCDF files to read, in order
+        bbox: Optional (lat_min, lat_max, lon_min, lon_max) in degrees
+        coastal_mask: Optional boolean (lat, lon) array (or .npy path) of cells to keep
+        time_chunk: Time steps per chunk
+        lat_block: Latitude rows per chunk
+    """
+    if isinstance(coastal_mask, (str, Path)):
+        coastal_mask = np.load(coastal_mask)
+    
+    for file_path in nc_files:
+        file_path = Path(file_path)
+        try:
+            with xr.open_dataset(file_path) as ds:
+                if 'sla' not in ds.variables:
+                    continue
+                sla = ds['sla']
+                lat_dim, lon_dim, lats, lons = _grid_coords(ds, sla)
+                
+                lat_keep = np.ones(len(lats), dtype=bool)
+                lon_keep = np.ones(len(lons), dtype=bool)
+                if bbox is not None:
+                    lat_min, lat_max, lon_min, lon_max = bbox
+                    lat_keep = (lats >= lat_min) & (lats <= lat_max)
+                    # Compare longitudes on 0-360 so bboxes work for either convention
+                    lons360 = lons % 360
+                    lon_min, lon_max = lon_min % 360, lon_max % 360
+                    if lon_min <= lon_max:
+                        lon_keep = (lons360 >= lon_min) & (lons360 <= lon_max)
+                    else:
+                        lon_keep = (lons360 >= lon_min) | (lons360 <= lon_max)
+                lat_idx = np.flatnonzero(lat_keep)
+                lon_idx = np.flatnonzero(lon_keep)
+                if lat_idx.size == 0 or lon_idx.size == 0:
+                    continue
+                
+                times = pd.DatetimeIndex(ds['time'].values)
+                timestamps = np.asarray(times.strftime('%Y-%m-%dT%H:%M:%S'))
+                dates = np.asarray(times.strftime('%Y-%m-%d'))
+                
+                for t0 in range(0, len(times), time_chunk):
+                    for b0 in range(0, len(lat_idx), lat_block):
+                        block_lat = lat_idx[b0:b0 + lat_block]
+                        values = sla.isel({
+                            'time': slice(t0, t0 + time_chunk),
+                            lat_dim: block_lat,
+                            lon_dim: lon_idx
+                        }).values
+                        valid = ~np.isnan(values)
+                        if coastal_mask is not None:
+                            valid &= coastal_mask[np.ix_(block_lat, lon_idx)][np.newaxis]
+                        t_i, la_i, lo_i = np.nonzero(valid)
+                        if t_i.size == 0:
+                            continue
+                        t_i = t_i + t0
+                        yield pd.DataFrame({
+                            'timestamp': timestamps[t_i],
+                            'date': dates[t_i],
+                            'year': times.year.values[t_i],
+                            'month': times.month.values[t_i],
+                            'day': times.day.values[t_i],
+                            'sea_level_anomaly': values[valid],
+                            'latitude': lats[block_lat][la_i],
+                            'longitude': lons[lon_idx][lo_i],
+                            'data_source': 'satellite_altimetry',
+                            'file_name': file_path.name
+                        })
+        except Exception as e:
+            print(f"❌ Error processing {file_path.name}: {e}")
+            continue
+
 class CoastalDataMindsDB:
     """
     MindsDB integration for coastal data analysis.
@@ -57,192 +149,99 @@ class CoastalDataMindsDB:
             print(f"❌ Failed to connect to MindsDB: {e}")
             self.connection = None
     
-    def load_satellite_data(self, station_ids=None, limit_files=10):
+    def _open_sink(self, sink, datasource, table, batch_size):
+        """Return the given sink, or a MindsDB upload sink when none was passed"""
+        if sink is not None:
+            return sink
+        if not self.connection:
+            print("❌ MindsDB connection not available")
+            return None
+        return MindsDBSink(self.connection, datasource, table, batch_size=batch_size)
+    
+    def load_satellite_data(self, limit_files=None, bbox=None, coastal_mask=None,
+                            time_chunk=12, lat_block=90, sink=None, batch_size=50000):
         """
         Load satellite data into MindsDB
         
+        Every valid grid cell of every file is streamed in bounded chunks (see
+        iter_satellite_batches), so the result is complete and reproducible.
+        
         Args:
-            station_ids: List of station IDs to process (None for all)
-            limit_files: Limit number of NetCDF files to process (for testing)
+            limit_files: Limit number of NetCDF files to process (None for all)
+            bbox: Optional (lat_min, lat_max, lon_min, lon_max) to restrict the grid
+            coastal_mask: Optional boolean (lat, lon) mask or .npy path of cells to keep
+            time_chunk: Time steps read per chunk
+            lat_block: Latitude rows read per chunk
+            sink: DataSink to write to (defaults to a MindsDB upload)
+            batch_size: Rows per sink batch for the default sink
         """
-        if not self.connection:
-            print("❌ MindsDB connection not available")
+        sink = self._open_sink(sink, 'satellite_data', 'satellite_sea_level', batch_size)
+        if sink is None:
             return
         
         print("🛰️ Loading satellite data into MindsDB...")
         
-        # Get satellite data files
-        satellite_dir = Path("jiayou_sat_data/monthly_raw")
-        if not satellite_dir.exists():
-            print(f"❌ Satellite data directory not found: {satellite_dir}")
-            return
-        
-        nc_files = list(satellite_dir.glob("*.nc"))
-        if limit_files:
-            nc_files = nc_files[:limit_files]
-        
-        print(f"📊 Found {len(nc_files)} satellite data files")
-        
-        # Process each file and extract data
-        all_satellite_data = []
-        
-        for file_path in nc_files[:5]:  # Process first 5 files for demo
-            try:
-                print(f"Processing {file_path.name}...")
-                
-                # Read NetCDF file
-                ds = xr.open_dataset(file_path)
-                
-                # Extract time information
-                time_coords = ds.time.values
+        # The sink is closed on success and discarded on failure, never left half-written
+        try:
+            with sink:
+                # Get satellite data files
+                satellite_dir = Path("jiayou_sat_data/monthly_raw")
+                if not satellite_dir.exists():
+                    print(f"❌ Satellite data directory not found: {satellite_dir}")
+                    return
                 
-                # Extract sea level anomaly data
-                if 'sla' in ds.variables:
-                    sla_data = ds.sla.values
-                    
-                    # Get coordinates
-                    lats = ds.lat.values if 'lat' in ds.coords else None
-                    lons = ds.lon.values if 'lon' in ds.coords else None
-                    
-                    # Create sample data points (for demo purposes)
-                    # In production, you'd want to extract all valid data points
-                    sample_indices = np.random.choice(len(time_coords), min(100, len(time_coords)), replace=False)
-                    
-                    for idx in sample_indices:
-                        time_val = pd.to_datetime(time_coords[idx])
-                        
-                        # Sample some spatial points
-                        if sla_data.ndim >= 3:
-                            # Take a sample from the spatial grid
-                            lat_idx = np.random.randint(0, sla_data.shape[1] if sla_data.shape[1] > 0 else 1)
-                            lon_idx = np.random.randint(0, sla_data.shape[2] if sla_data.shape[2] > 0 else 1)
-                            
-                            sla_value = float(sla_data[idx, lat_idx, lon_idx])
-                            lat_value = float(lats[lat_idx]) if lats is not None else 0.0
-                            lon_value = float(lons[lon_idx]) if lons is not None else 0.0
-                        else:
-                            sla_value = float(sla_data[idx]) if sla_data.ndim == 1 else 0.0
-                            lat_value = 0.0
-                            lon_value = 0.0
-                        
-                        # Skip NaN values
-                        if not np.isnan(sla_value):
-                            all_satellite_data.append({
-                                'timestamp': time_val.isoformat(),
-                                'date': time_val.strftime('%Y-%m-%d'),
-                                'year': time_val.year,
-                                'month': time_val.month,
-                                'day': time_val.day,
-                                'sea_level_anomaly': sla_value,
-                                'latitude': lat_value,
-                                'longitude': lon_value,
-                                'data_source': 'satellite_altimetry',
-                                'file_name': file_path.name
-                            })
+                nc_files = sorted(satellite_dir.glob("*.nc"))
+                if limit_files:
+                    nc_files = nc_files[:limit_files]
                 
-                ds.close()
+                print(f"📊 Found {len(nc_files)} satellite data files")
                 
-            except Exception as e:
-                print(f"❌ Error processing {file_path.name}: {e}")
-                continue
-        
-        if all_satellite_data:
-            # Create DataFrame
-            satellite_df = pd.DataFrame(all_satellite_data)
-            
-            # Save to CSV for MindsDB
-            satellite_csv_path = "satellite_data_for_mindsdb.csv"
-            satellite_df.to_csv(satellite_csv_path, index=False)
-            
-            # Upload to MindsDB
-            try:
-                self.connection.upload_file(
-                    satellite_csv_path,
-                    'satellite_data',
-                    'satellite_sea_level'
-                )
-                print(f"✅ Uploaded {len(satellite_df)} satellite data records to MindsDB")
-            except Exception as e:
-                print(f"❌ Failed to upload satellite data: {e}")
-            
-            # Clean up
-            if os.path.exists(satellite_csv_path):
-                os.remove(satellite_csv_path)
+                # Stream batches to the sink instead of collecting every row in memory
+                batches = iter_satellite_batches(nc_files, bbox=bbox, coastal_mask=coastal_mask,
+                                                 time_chunk=time_chunk, lat_block=lat_block)
+                for batch in batches:
+                    sink.write(batch)
+        except Exception as e:
+            print(f"❌ Failed to load satellite data: {e}")
     
-    def load_tide_data(self):
-        """Load tide prediction data into MindsDB"""
-        if not self.connection:
-            print("❌ MindsDB connection not available")
+    def load_tide_data(self, sink=None, batch_size=50000):
+        """
+        Load tide prediction data into MindsDB
+        
+        Args:
+            sink: DataSink to write to (defaults to a MindsDB upload)
+            batch_size: Rows per sink batch for the default sink
+        """
+        sink = self._open_sink(sink, 'tide_data', 'tide_predictions', batch_size)
+        if sink is None:
             return
         
         print("🌊 Loading tide prediction data into MindsDB...")
         
         # Available stations
-        stations = ['portjefferson', 'miami', 'nyc']
-        all_tide_data = []
+        stations = station_keys()
         
-        for station in stations:
-            try:
-                print(f"Processing tide data for {station}...")
-                
-                # Parse tide data
-                tide_data = parse_tide_data(station)
-                
-                for record in tide_data:
-                    record['station'] = station
-                    all_tide_data.append(record)
-                
-                print(f"✅ Processed {len(tide_data)} records for {station}")
-                
-            except Exception as e:
-                print(f"❌ Error processing tide data for {station}: {e}")
-                continue
-        
-        if all_tide_data:
-            # Create DataFrame
-            tide_df = pd.DataFrame(all_tide_data)
-            
-            # Convert datetime string to separate date and time columns
-            tide_df['datetime'] = pd.to_datetime(tide_df['datetime'])
-            tide_df['date'] = tide_df['datetime'].dt.strftime('%Y-%m-%d')
-            tide_df['time'] = tide_df['datetime'].dt.strftime('%H:%M:%S')
-            tide_df['year'] = tide_df['datetime'].dt.year
-            tide_df['month'] = tide_df['datetime'].dt.month
-            tide_df['day'] = tide_df['datetime'].dt.day
-            tide_df['hour'] = tide_df['datetime'].dt.hour
-            tide_df['minute'] = tide_df['datetime'].dt.minute
-            
-            # Drop original datetime column
-            tide_df = tide_df.drop('datetime', axis=1)
-            
-            # Save to CSV for MindsDB
-            tide_csv_path = "tide_data_for_mindsdb.csv"
-            tide_df.to_csv(tide_csv_path, index=False)
-            
-            # Upload to MindsDB
-            try:
-                self.connection.upload_file(
-                    tide_csv_path,
-                    'tide_data',
-                    'tide_predictions'
-                )
-                print(f"✅ Uploaded {len(tide_df)} tide prediction records to MindsDB")
-            except Exception as e:
-                print(f"❌ Failed to upload tide data: {e}")
-            
-            # Clean up
-            if os.path.exists(tide_csv_path):
-                os.remove(tide_csv_path)
+        try:
+            with sink:
+                # One DataFrame for all stations, with calendar features built vectorially
+                tide_df = tide_dataframe(stations)
+                for station, count in tide_df['station'].value_counts(sort=False).items():
+                    print(f"✅ Processed {count} records for {station}")
+                sink.write(tide_df)
+        except Exception as e:
+            print(f"❌ Failed to load tide data: {e}")
     
-    def load_processed_satellite_data(self, station_ids=None):
+    def load_processed_satellite_data(self, station_ids=None, sink=None, batch_size=50000):
         """
         Load processed satellite data for specific stations
         
         Args:
-            station_ids: List of station IDs to process
+            station_ids: List of station IDs or names to process
+            sink: DataSink to write to (defaults to a MindsDB upload)
+            batch_size: Rows per sink batch for the default sink
         """
-        if not self.connection:
-            print("❌ MindsDB connection not available")
+        sink = self._open_sink(sink, 'processed_satellite_data', 'processed_satellite', batch_size)
+        if sink is None:
             return
         
         print("📈 Loading processed satellite data into MindsDB...")
@@ -251,58 +250,48 @@ class CoastalDataMindsDB:
         if station_ids is None:
             station_ids = [1, 2, 3, 4, 5]  # Sample station IDs
         
-        all_processed_data = []
-        
-        for station_id in station_ids:
-            try:
-                print(f"Processing station {station_id}...")
-                
-                # Read processed satellite data
-                processed_data = read_satellite_data_station(station_id, from_file=True)
+        try:
+            with sink:
+                # Station names resolve to ids first; one that cannot is skipped, not fatal
+                resolved = []
+                for station_name in station_ids:
+                    try:
+                        resolved.append(resolve_station_id(station_name))
+                    except Exception as e:
+                        print(f"❌ Could not resolve station {station_name}: {e}")
+                station_ids = list(dict.fromkeys(resolved))
                 
-                if processed_data is not None and not processed_data.empty:
-                    # Add station information
-                    processed_data['station_id'] = station_id
-                    processed_data['data_source'] = 'processed_satellite'
-                    
-                    # Convert date column
-                    processed_data['date'] = pd.to_datetime(processed_data['date'])
-                    processed_data['year'] = processed_data['date'].dt.year
-                    processed_data['month'] = processed_data['date'].dt.month
-                    processed_data['day'] = processed_data['date'].dt.day
-                    
-                    # Convert date back to string for CSV
-                    processed_data['date'] = processed_data['date'].dt.strftime('%Y-%m-%d')
-                    
-                    all_processed_data.append(processed_data)
-                    print(f"✅ Processed {len(processed_data)} records for station {station_id}")
+                # Make sure every requested station is in the columnar store
+                store = StationStore()
+                for station_id in station_ids:
+                    if station_id not in store:
+                        try:
+                            print(f"Processing station {station_id}...")
+                            read_satellite_data_station(station_id, from_file=True)
+                        except Exception as e:
+                            print(f"❌ Error processing station {station_id}: {e}")
+                store.reload()
                 
-            except Exception as e:
-                print(f"❌ Error processing station {station_id}: {e}")
-                continue
-        
-        if all_processed_data:
-            # Combine all processed data
-            combined_df = pd.concat(all_processed_data, ignore_index=True)
-            
-            # Save to CSV for MindsDB
-            processed_csv_path = "processed_satellite_data_for_mindsdb.csv"
-            combined_df.to_csv(processed_csv_path, index=False)
-            
-            # Upload to MindsDB
-            try:
-                self.connection.upload_file(
-                    processed_csv_path,
-                    'processed_satellite_data',
-                    'processed_satellite'
-                )
-                print(f"✅ Uploaded {len(combined_df)} processed satellite records to MindsDB")
-            except Exception as e:
-                print(f"❌ Failed to upload processed satellite data: {e}")
-            
-            # Clean up
-            if os.path.exists(processed_csv_path):
-                os.remove(processed_csv_path)
+                # Read all stations as row views of the store and flatten them at once
+                series = store.series_many(station_ids)
+                if not series:
+                    return
+                n_months = len(store.months)
+                dates = pd.DatetimeIndex(np.tile(store.months, len(series)))
+                combined_df = pd.DataFrame({
+                    'date': dates.strftime('%Y-%m-%d'),
+                    'sla': np.concatenate(list(series.values())),
+                    'station_id': np.repeat(list(series.keys()), n_months),
+                    'data_source': 'processed_satellite',
+                    'year': dates.year,
+                    'month': dates.month,
+                    'day': dates.day
+                })
+                combined_df = combined_df[combined_df['sla'].notna()].reset_index(drop=True)
+                print(f"✅ Loaded {len(series)} stations from the station store")
+                sink.write(combined_df)
+        except Exception as e:
+            print(f"❌ Failed to load processed satellite data: {e}")
     
     def create_ai_models(self):
         """Create AI models for different predictions"""
@@ -0,0 +1,180 @@
+"""
+Opt-in request profiling for the Flask app.
+
+Profiling is off unless PROFILE_SECRET is set (app config or environment). A
+request decorated with @profiled is then run under cProfile when it carries the
+secret in an ``X-Profile`` header or a ``profile`` query parameter. Profiles are
+kept in a bounded ring buffer and served, with the same secret, at:
+
+    /debug/profiles                      list of recent profiles
+    /debug/profiles/<id>                 one profile (?sort=tottime&limit=80)
+    /debug/profiles/aggregate            all buffered profiles merged (?endpoint=index)
+
+Under a multi-process server set PROFILE_DIR (gunicorn.conf.py does): profiles are
+then written there (<id>.json metadata and <id>.prof stats) instead of to the
+in-process buffer, so every worker serves every worker's profiles. Ids are claimed
+with exclusive file creation and the newest PROFILE_BUFFER_SIZE are kept.
+"""
+
+import cProfile
+import functools
+import glob
+import hmac
+import io
+import itertools
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+PROFILE_BUFFER_SIZE = 50
+
+# Shared profile directory for multi-process servers (None: in-process ring buffer)
+PROFILE_DIR = os.getenv('PROFILE_DIR') or None
+
+_profiles = deque(maxlen=PROFILE_BUFFER_SIZE)
+_profile_ids = itertools.count(1)
+_buffer_lock = threading.Lock()
+# cProfile hooks are process-wide on newer Pythons, so profile one request at a time
+_profiler_lock = threading.Lock()
+
+
+def _secret():
+    from flask import current_app
+    return current_app.config.get('PROFILE_SECRET') or os.getenv('PROFILE_SECRET')
+
+
+def _authorized():
+    from flask import request
+    secret = _secret()
+    supplied = request.headers.get('X-Profile') or request.args.get('profile')
+    return bool(secret) and supplied is not None and hmac.compare_digest(supplied, secret)
+
+
+def profiled(view):
+    """Run the view under cProfile when the request asks for it with the secret"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import request
+        if not _authorized() or not _profiler_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                profiler.disable()
+        finally:
+            _profiler_lock.release()
+            _store({
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'duration_ms': (time.perf_counter() - started) * 1000,
+            }, pstats.Stats(profiler))
+    return wrapper
+
+
+def _stored_ids():
+    """Claimed profile ids in PROFILE_DIR (a .prof file exists; its .json is written last)"""
+    return sorted(int(os.path.basename(path)[:-5]) for path in glob.glob(os.path.join(PROFILE_DIR, '*.prof')))
+
+
+def _store(profile, stats):
+    """Add a profile to the ring buffer, or to PROFILE_DIR shared by all workers"""
+    if not PROFILE_DIR:
+        with _buffer_lock:
+            _profiles.append({'id': next(_profile_ids), **profile, 'stats': stats})
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    while True:
+        # Claim the next id across processes by creating its stats file exclusively
+        ids = _stored_ids()
+        profile_id = ids[-1] + 1 if ids else 1
+        try:
+            os.close(os.open(os.path.join(PROFILE_DIR, f'{profile_id}.prof'), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            continue
+    stats.dump_stats(os.path.join(PROFILE_DIR, f'{profile_id}.prof'))
+    meta_path = os.path.join(PROFILE_DIR, f'{profile_id}.json')
+    with open(f'{meta_path}.tmp', 'w') as f:
+        json.dump({'id': profile_id, 'pid': os.getpid(), **profile}, f)
+    os.replace(f'{meta_path}.tmp', meta_path)
+    for old_id in ids[:max(0, len(ids) + 1 - PROFILE_BUFFER_SIZE)]:
+        for suffix in ('json', 'prof'):  # metadata first, so readers never see it without stats
+            try:
+                os.remove(os.path.join(PROFILE_DIR, f'{old_id}.{suffix}'))
+            except FileNotFoundError:
+                pass
+
+
+def _stored_profiles():
+    """Profiles in PROFILE_DIR, oldest first; 'stats' is the .prof path (pstats.Stats.add accepts it)"""
+    profiles = []
+    for profile_id in _stored_ids():
+        try:
+            with open(os.path.join(PROFILE_DIR, f'{profile_id}.json')) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profiles.append({**profile, 'stats': os.path.join(PROFILE_DIR, f'{profile_id}.prof')})
+    return profiles
+
+
+def _report(profiles, sort, limit):
+    """Merge the profiles' stats into a fresh Stats (sorting mutates it) and print them"""
+    stream = io.StringIO()
+    merged = pstats.Stats(stream=stream)
+    for profile in profiles:
+        merged.add(profile['stats'])
+    merged.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def init_app(app):
+    """Register the /debug/profiles routes"""
+    from flask import Response, abort, jsonify, request
+
+    app.config.setdefault('PROFILE_SECRET', os.getenv('PROFILE_SECRET'))
+
+    def _snapshot():
+        if not _authorized():
+            abort(404)
+        if PROFILE_DIR:
+            return _stored_profiles()
+        with _buffer_lock:
+            return list(_profiles)
+
+    def _sort_and_limit():
+        return request.args.get('sort', 'cumulative'), request.args.get('limit', default=60, type=int)
+
+    @app.route('/debug/profiles')
+    def list_profiles():
+        profiles = _snapshot()
+        return jsonify([{k: v for k, v in p.items() if k != 'stats'} for p in reversed(profiles)])
+
+    @app.route('/debug/profiles/aggregate')
+    def aggregate_profiles():
+        endpoint = request.args.get('endpoint')
+        profiles = [p for p in _snapshot() if endpoint in (None, p['endpoint'])]
+        if not profiles:
+            abort(404)
+        header = f"{len(profiles)} profiles, endpoint={endpoint or 'all'}\n\n"
+        return Response(header + _report(profiles, *_sort_and_limit()), mimetype='text/plain')
+
+    @app.route('/debug/profiles/<int:profile_id>')
+    def show_profile(profile_id):
+        profile = next((p for p in _snapshot() if p['id'] == profile_id), None)
+        if profile is None:
+            abort(404)
+        header = (f"{profile['method']} {profile['path']} ({profile['endpoint']}) "
+                  f"{profile['duration_ms']:.1f} ms at {profile['timestamp']}\n\n")
+        return Response(header + _report([profile], *_sort_and_limit()),
+                        mimetype='text/plain')
@@ -0,0 +1,48 @@
+"""
+Import-time budget for app.py.
+
+Importing the app must not pull in Earth Engine, folium or OpenAI (they are
+initialized lazily or by the warm-up thread) and must stay within a time
+budget so workers boot quickly. Run with: python -m pytest test_app_startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+IMPORT_BUDGET_SECONDS = float(os.getenv('IMPORT_BUDGET_SECONDS', '3.0'))
+LAZY_MODULES = ('ee', 'folium', 'openai')
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def _import_app():
+    env = dict(os.environ, WARMUP='0')
+    result = subprocess.run([sys.executable, '-c', _PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture(scope='module')
+def app_import():
+    pytest.importorskip('flask')
+    return _import_app()
+
+
+def test_heavy_backends_not_imported(app_import):
+    assert app_import['loaded'] == []
+
+
+def test_import_within_budget(app_import):
+    assert app_import['seconds'] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,205 @@
+"""
+Water level analytics over the interpolated tide curve.
+
+Threshold exceedance: how long the water stands above one or more levels over a
+period, when it first and last crosses them, and how often per day. The curve is
+built once (tide_data_parser.level_curve) and every threshold is a vectorized pass
+over it: crossings are the sign changes of level - threshold, timed by linear
+interpolation between the neighbouring samples.
+
+Station comparison: the stations' curves on one common time grid, and for every pair
+the phase lag (the peak of their FFT cross-correlation) and amplitude ratio.
+
+    exceedance('nyc', date(2025, 6, 1), date(2025, 6, 30), [1.2, 1.5])
+    compare_stations(['nyc', 'portjefferson'], date(2025, 6, 1), date(2025, 6, 30))
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+from tide_data_parser import level_curve, station_now
+
+# Samples (thresholds x curve points) evaluated per block
+EXCEEDANCE_BLOCK = 4_000_000
+# Largest phase lag searched (minutes): half the M2 period, beyond which lags alias
+MAX_PHASE_LAG = 372
+# Days compared when no range is given
+COMPARE_DAYS = 30
+
+
+def _minutes_iso(minutes):
+    """ISO timestamp (minute precision) of epoch minutes"""
+    return str(np.datetime64(int(round(minutes)), 'm'))
+
+
+def _crossings(levels, threshold):
+    """
+    (fraction above, crossing, crossing offset, above at the end) per threshold row
+    and segment between consecutive samples; the offset is the fraction of the
+    segment at which the curve meets the threshold
+    """
+    y0, y1 = levels[:-1], levels[1:]
+    above0 = y0[None, :] > threshold[:, None]
+    above1 = y1[None, :] > threshold[:, None]
+    crossing = above0 != above1
+    # Fraction of each crossing segment above the threshold (linear between samples)
+    span = np.abs(y1 - y0)[None, :]
+    partial = (np.maximum(y0, y1)[None, :] - threshold[:, None]) / np.where(span > 0, span, 1)
+    fraction = np.where(crossing, np.clip(partial, 0, 1), above0.astype(np.float64))
+    # Where in the segment the curve meets the threshold
+    offset = np.where(crossing, (threshold[:, None] - y0[None, :]) / np.where(y1 != y0, y1 - y0, 1)[None, :], 0)
+    return fraction, crossing, np.clip(offset, 0, 1), above1
+
+
+def exceedance(station, from_date, to_date, thresholds, interval=6):
+    """
+    Exceedance of each threshold (metres) from the start of from_date to the end of
+    to_date (dates), over the curve sampled every interval minutes:
+    {'station', 'from_date', 'to_date', 'interval', 'source', 'days', 'thresholds': [
+      {'threshold', 'hours_above', 'fraction_above', 'first_crossing', 'last_crossing',
+       'crossings_up', 'crossings_down', 'daily_hours', 'daily_exceedances'}]}
+    Crossing times are ISO strings (None without a crossing); daily_exceedances counts
+    the up-crossings each day. None if the station is unknown or has no data there.
+    """
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+    # The closing midnight sample gives the last day its full length
+    curve = level_curve(station, from_date, to_date, interval, endpoint=True)
+    if curve is None or len(thresholds) == 0:
+        return None
+    times, levels, source = curve
+    if len(times) < 2:
+        return None
+
+    minutes = times.astype(np.int64).astype(np.float64)
+    # Every segment is interval minutes long except possibly the last, which stops at midnight
+    widths = np.diff(minutes)
+    days = times[:-1].astype('datetime64[D]')
+    day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+
+    results = []
+    block = max(1, EXCEEDANCE_BLOCK // len(minutes))
+    for first in range(0, len(thresholds), block):
+        rows = thresholds[first:first + block]
+        fraction, crossing, offset, upward = _crossings(levels, rows)
+        hours = fraction * (widths / 60)
+        daily_hours = np.add.reduceat(hours, day_starts, axis=1)
+        daily_up = np.add.reduceat(crossing & upward, day_starts, axis=1)
+        crossing_minutes = minutes[:-1][None, :] + offset * widths
+
+        for row, threshold in enumerate(rows):
+            at = np.flatnonzero(crossing[row])
+            up = int(np.count_nonzero(upward[row, at]))
+            total = float(hours[row].sum())
+            results.append({
+                'threshold': float(threshold),
+                'hours_above': round(total, 2),
+                'fraction_above': round(float(total * 60 / (minutes[-1] - minutes[0])), 4),
+                'first_crossing': _minutes_iso(crossing_minutes[row, at[0]]) if len(at) else None,
+                'last_crossing': _minutes_iso(crossing_minutes[row, at[-1]]) if len(at) else None,
+                'crossings_up': up,
+                'crossings_down': len(at) - up,
+                'daily_hours': np.round(daily_hours[row], 2).tolist(),
+                'daily_exceedances': daily_up[row].astype(int).tolist(),
+            })
+
+    return {
+        'station': station,
+        'from_date': str(from_date),
+        'to_date': str(to_date),
+        'interval': int(interval),
+        'source': source,
+        'days': [str(day) for day in days[day_starts]],
+        'thresholds': results,
+    }
+
+
+def aligned_levels(stations, from_date, to_date, interval=6):
+    """
+    The stations' water levels on one grid every interval minutes from the start of
+    from_date to the end of to_date: (times, levels (stations x times), sources), or
+    None if any station is unknown or has no data there.
+    """
+    curves = [level_curve(station, from_date, to_date, interval) for station in stations]
+    if any(curve is None for curve in curves):
+        return None
+    return curves[0][0], np.vstack([curve[1] for curve in curves]), [curve[2] for curve in curves]
+
+
+def phase_lags(levels, interval, max_lag=MAX_PHASE_LAG):
+    """
+    (pairs (i, j) with i < j, lag minutes of j behind i, amplitude ratio j / i,
+    correlation at the lag) for the rows of levels: every pair's cross-correlation
+    comes from one batched FFT, its peak refined by a parabola through the
+    neighbouring lags
+    """
+    n_stations, n = levels.shape
+    first, second = np.triu_indices(n_stations, k=1)
+    anomaly = levels - levels.mean(axis=1, keepdims=True)
+    spread = anomaly.std(axis=1)
+    spectra = np.fft.rfft(anomaly, n=2 * n, axis=1)
+    # correlation[k] = sum_t a[t] * b[t + k], with negative k wrapped to the end
+    correlation = np.fft.irfft(np.conj(spectra[first]) * spectra[second], n=2 * n, axis=1)
+
+    reach = min(int(max_lag // interval), n - 1)
+    shifts = np.arange(-reach, reach + 1)
+    window = correlation[:, shifts % (2 * n)]
+    peak = window.argmax(axis=1)
+    rows = np.arange(len(first))
+    if len(shifts) >= 3:
+        peak = np.clip(peak, 1, len(shifts) - 2)
+        before, at, after = window[rows, peak - 1], window[rows, peak], window[rows, peak + 1]
+        curvature = before - 2 * at + after
+        refine = np.where(curvature < 0, 0.5 * (before - after) / np.where(curvature < 0, curvature, -1), 0)
+    else:
+        at, refine = window[rows, peak], np.zeros(len(first))
+    lag = (shifts[peak] + refine) * interval
+    scale = n * spread[first] * spread[second]
+    ratio = spread[second] / np.where(spread[first] > 0, spread[first], np.nan)
+    return np.c_[first, second], lag, ratio, at / np.where(scale > 0, scale, np.nan)
+
+
+def compare_range(station, from_date=None, to_date=None):
+    """
+    (from_date, to_date) with the defaults filled in: COMPARE_DAYS days from today at the
+    station, ending at to_date when only that is given, or starting at from_date
+    """
+    if from_date is None:
+        if to_date is not None:
+            return to_date - timedelta(days=COMPARE_DAYS - 1), to_date
+        from_date = station_now(station).astype('datetime64[D]').astype(object)
+    if to_date is None:
+        to_date = from_date + timedelta(days=COMPARE_DAYS - 1)
+    return from_date, to_date
+
+
+def compare_stations(stations, from_date=None, to_date=None, interval=6):
+    """
+    Phase lag and amplitude ratio of every pair of stations from the start of from_date
+    to the end of to_date (defaults from compare_range for the first station):
+    {'stations', 'from_date', 'to_date', 'interval', 'sources': {station: source},
+     'pairs': [{'reference', 'station', 'lag_minutes', 'amplitude_ratio', 'correlation'}]}
+    A positive lag means the station's tide arrives after the reference's. None if any
+    station is unknown or has no data there.
+    """
+    from_date, to_date = compare_range(stations[0], from_date, to_date)
+    aligned = aligned_levels(stations, from_date, to_date, interval)
+    if aligned is None:
+        return None
+    times, levels, sources = aligned
+    pairs, lag, ratio, correlation = phase_lags(levels, interval)
+
+    return {
+        'stations': list(stations),
+        'from_date': str(from_date),
+        'to_date': str(to_date),
+        'interval': int(interval),
+        'sources': dict(zip(stations, sources)),
+        'pairs': [{
+            'reference': stations[i],
+            'station': stations[j],
+            'lag_minutes': round(float(lag[k]), 1),
+            'amplitude_ratio': round(float(ratio[k]), 3),
+            'correlation': round(float(correlation[k]), 3),
+        } for k, (i, j) in enumerate(pairs)],
+    }
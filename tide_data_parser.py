@@ -1,186 +1,1031 @@
 import re
+import io
+import os
+import glob
+import hashlib
+import threading
+from xml.etree import ElementTree
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import json
+import numpy as np
+import pandas as pd
 
-def parse_tide_data(station):
-    """Parse tide data from NOAA text file for specified station"""
-    tide_data = []
+from metrics import timed_stage
+import tide_harmonics
+import tide_offsets
+from downsampling import downsample
+
+# Map station names to file names
+STATION_FILES = {
+    'portjefferson': 'HighTide/portJeff.txt',
+    'miami': 'HighTide/miami.txt',
+    'nyc': 'HighTide/nycBatteryPark.txt'
+}
+
+# NOAA LST_LDT files are in the station's local clock time; the bundled stations are all US Eastern
+DEFAULT_TIME_ZONE = 'America/New_York'
+STATION_TIME_ZONES = {}
+
+# Stations without a file of their own, predicted from a reference station's events
+# with NOAA subordinate offsets (see register_subordinate_station)
+SUBORDINATE_STATIONS = {}
+
+# 'HH:MM:00' label for every minute of the day
+_TIME_LABELS = np.array([f'{m // 60:02d}:{m % 60:02d}:00' for m in range(24 * 60)])
+# NOAA's 'HH:MM AM' label for every minute of the day
+CLOCK_LABELS = np.array([f'{(m // 60) % 12 or 12:02d}:{m % 60:02d} {"AM" if m < 720 else "PM"}'
+                          for m in range(24 * 60)])
+# Weekday of datetime64[D] day number % 7 (1970-01-01 was a Thursday)
+WEEKDAYS = np.array(['Thu', 'Fri', 'Sat', 'Sun', 'Mon', 'Tue', 'Wed'])
+
+FEET_TO_METERS = 0.3048
+_DATA_COLUMNS = ['date', 'day', 'time', 'prediction', 'type']
+_MALFORMED_EXAMPLES = 5
+_BLANK_LINE = re.compile(r'\n[ \t\r]*(?=\n)')
+
+# XML <item> children and the fixed-width dtypes they are packed into
+_XML_ITEM_FIELDS = {'date': 'S11', 'day': 'S4', 'time': 'S9', 'pred': 'S16', 'highlow': 'S1'}
+XML_CHUNK_SIZE = 50000
+# XML header tags under the key names used in the text export header
+_XML_METADATA_KEYS = {
+    'origin': 'Origin',
+    'disclaimer': 'Disclaimer',
+    'stationname': 'StationName',
+    'state': 'State',
+    'stationid': 'Stationid',
+    'stationtype': 'Prediction Type',
+    'referencedToStationName': 'ReferencedToStationName',
+    'referencedToStationId': 'ReferencedToStationId',
+    'HeightOffsetLow': 'HeightOffsetLow',
+    'HeightOffsetHigh': 'HeightOffsetHigh',
+    'TimeOffsetLow': 'TimeOffsetLow',
+    'TimeOffsetHigh': 'TimeOffsetHigh',
+    'BeginDate': 'BeginDate',
+    'EndDate': 'EndDate',
+    'dataUnits': 'Units',
+    'Timezone': 'Time Zone',
+    'Datum': 'Datum',
+    'IntervalType': 'Interval Type'
+}
+
+def _fixed_width(values, width):
+    """
+    Strings as a uint8 matrix of width + 1 bytes per row; shorter values are
+    NUL-padded and a non-NUL last byte marks a value that is too long
+    """
+    raw = np.ascontiguousarray(values, dtype=f'S{width + 1}')
+    return np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(-1, width + 1)
+
+def _field(block, start, stop):
+    """Integer value of the digit columns start:stop, and a mask of rows where they are all digits"""
+    digits = block[:, start:stop].astype(np.int64) - ord('0')
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    value = digits @ (10 ** np.arange(stop - start - 1, -1, -1))
+    return value, valid
+
+def _parse_times(dates, times):
+    """
+    datetime64[m] of 'YYYY/MM/DD' date and 'HH:MM AM' time strings, parsed as fixed-width
+    bytes, and a mask of the rows that were well-formed
+    """
+    d = _fixed_width(dates, 10)
+    t = _fixed_width(times, 8)
+    year, ok_year = _field(d, 0, 4)
+    month, ok_month = _field(d, 5, 7)
+    day, ok_day = _field(d, 8, 10)
+    hour, ok_hour = _field(t, 0, 2)
+    minute, ok_minute = _field(t, 3, 5)
+    
+    meridiem = t[:, 6]
+    valid = (ok_year & ok_month & ok_day & ok_hour & ok_minute
+             & (d[:, 4] == ord('/')) & (d[:, 7] == ord('/')) & (d[:, 10] == 0)
+             & (t[:, 2] == ord(':')) & (t[:, 5] == ord(' ')) & (t[:, 7] == ord('M')) & (t[:, 8] == 0)
+             & ((meridiem == ord('A')) | (meridiem == ord('P')))
+             & (month >= 1) & (month <= 12) & (hour >= 1) & (hour <= 12) & (minute <= 59) & (day >= 1))
     
-    # Map station names to file names
-    station_files = {
-        'portjefferson': 'HighTide/portJeff.txt',
-        'miami': 'HighTide/miami.txt',
-        'nyc': 'HighTide/nycBatteryPark.txt'
+    month_start = ((np.where(valid, year, 1970) - 1970) * 12 + np.where(valid, month, 1) - 1).astype('datetime64[M]')
+    days_in_month = ((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(np.int64)
+    valid &= day <= days_in_month
+    
+    minute_of_day = (hour % 12 + np.where(meridiem == ord('P'), 12, 0)) * 60 + minute
+    values = (month_start.astype('datetime64[D]') + (day - 1)).astype('datetime64[m]') + minute_of_day
+    return values, valid
+
+def _read_header(text):
+    """Split a NOAA text export into its header metadata and the data block"""
+    match = re.search(r'^\d{4}/\d{2}/\d{2}', text, re.M)
+    start = match.start() if match else len(text)
+    metadata = {}
+    for line in text[:start].splitlines():
+        key, sep, value = line.partition(':')
+        if sep and not key.startswith('Date'):
+            metadata[key.strip()] = value.strip()
+    return metadata, text[start:]
+
+def _as_text(value):
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+def _tide_arrays(file_path, metadata, dates, days, times, predictions, types, skipped=0):
+    """
+    Shared tail of the text and XML readers. Takes the raw columns (dates, days,
+    times and types as fixed-width bytes, predictions as read), validates and
+    converts them, and returns the read_tide_file() arrays.
+    """
+    event_times, valid = _parse_times(dates, times)
+    heights = pd.to_numeric(pd.Series(predictions), errors='coerce').to_numpy(dtype=np.float64)
+    valid &= ~np.isnan(heights)
+    if metadata.get('Units', 'Metric') == 'Feet':
+        heights = heights * FEET_TO_METERS  # Convert feet to meters
+    types = np.where(types == b'', b'H', types).astype('U1')  # H for high, L for low
+    
+    bad = np.flatnonzero(~valid)
+    malformed = {
+        'count': int(len(bad) + skipped),
+        'examples': ['\t'.join(_as_text(column[i]) for column in (dates, days, times, predictions, types))
+                     for i in bad[:_MALFORMED_EXAMPLES]]
     }
+    if malformed['count']:
+        print(f"⚠️ Skipped {malformed['count']} malformed rows in {file_path}")
     
-    if station not in station_files:
-        return []
+    order = np.argsort(event_times[valid], kind='stable')
+    arrays = {
+        'times': event_times[valid][order],
+        'heights': heights[valid][order],
+        'types': types[valid][order],
+        'metadata': metadata,
+        'malformed': malformed
+    }
+    for key in ('times', 'heights', 'types'):
+        arrays[key].flags.writeable = False
+    return arrays
+
+def read_tide_text(file_path):
+    """Parse a NOAA High/Low text export (see read_tide_file)"""
+    with open(file_path, 'r') as file:
+        text = file.read()
+    metadata, data = _read_header(text)
+    
+    # Text columns as fixed-width bytes, one byte wider than a valid value to catch overlong ones
+    frame = pd.read_csv(io.StringIO(data), sep='\t', header=None, names=_DATA_COLUMNS,
+                        dtype={'date': 'S11', 'day': 'S4', 'time': 'S9', 'type': 'S1'},
+                        on_bad_lines='skip', engine='c')
+    # Non-blank lines, to count the ones read_csv skipped for having too many fields
+    stripped = data.rstrip()
+    n_lines = stripped.count('\n') + 1 - len(_BLANK_LINE.findall(stripped)) if stripped else 0
+    
+    return _tide_arrays(file_path, metadata, *(frame[c].to_numpy() for c in _DATA_COLUMNS),
+                        skipped=n_lines - len(frame))
+
+class _NoaaXmlTarget:
+    """ElementTree parser target collecting <item> fields and header tags without building a tree"""
     
-    file_path = station_files[station]
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.metadata = {}
+        self.chunks = []
+        self.rows = {field: [] for field in _XML_ITEM_FIELDS}
+        self.item = None
+        self.text = []
+        self.depth = 0
+    
+    def start(self, tag, attrib):
+        self.depth += 1
+        self.text.clear()
+        if tag == 'item':
+            self.item = {}
+    
+    def data(self, text):
+        self.text.append(text)
+    
+    def end(self, tag):
+        self.depth -= 1
+        value = ''.join(self.text).strip()
+        self.text.clear()
+        if self.item is not None:
+            if tag == 'item':
+                for field, values in self.rows.items():
+                    values.append(self.item.get(field, ''))
+                self.item = None
+                if len(self.rows['date']) >= self.chunk_size:
+                    self.pack()
+            else:
+                self.item[tag] = value
+        elif tag in _XML_METADATA_KEYS or (self.depth == 1 and tag != 'data'):
+            self.metadata[_XML_METADATA_KEYS.get(tag, tag)] = value
+    
+    def pack(self):
+        self.chunks.append([np.array(self.rows[field], dtype=dtype)
+                            for field, dtype in _XML_ITEM_FIELDS.items()])
+        for values in self.rows.values():
+            values.clear()
+    
+    def close(self):
+        self.pack()
+        return self
+
+def read_tide_xml(file_path, chunk_size=XML_CHUNK_SIZE, block_size=1 << 20):
+    """
+    Parse a NOAA High/Low XML export (the layout of HighTide/portJeff.xml, see
+    read_tide_file) incrementally. The file is fed to the parser block_size bytes
+    at a time and no element tree is kept; rows are packed into fixed-width arrays
+    every chunk_size items, so memory stays proportional to the output arrays
+    rather than to the document.
+    """
+    parser = ElementTree.XMLParser(target=_NoaaXmlTarget(chunk_size))
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            parser.feed(block)
+    target = parser.close()
+    
+    metadata = target.metadata
+    if metadata.get('Disclaimer', '').startswith('Disclaimer:'):
+        metadata['Disclaimer'] = metadata['Disclaimer'][len('Disclaimer:'):].strip()
+    if 'BeginDate' in metadata and 'EndDate' in metadata:
+        metadata['From'] = f"{metadata.pop('BeginDate')} - {metadata.pop('EndDate')}"
+    columns = [np.concatenate(column) for column in zip(*target.chunks)]
+    return _tide_arrays(file_path, metadata, *columns)
+
+@timed_stage('tide_parse')
+def read_tide_file(file_path):
+    """
+    Parse a NOAA High/Low export (.txt, or .xml via read_tide_xml) into arrays:
+    
+        times      datetime64[m], station local time, sorted
+        heights    float64 meters (Feet files converted)
+        types      'H' / 'L'
+        metadata   header fields (StationName, Stationid, Units, ...)
+        malformed  {'count': rows skipped, 'examples': first few skipped rows}
+    
+    Returns None if the file does not exist.
+    """
+    reader = read_tide_xml if str(file_path).lower().endswith('.xml') else read_tide_text
+    try:
+        return reader(file_path)
+    except FileNotFoundError:
+        print(f"File not found: {file_path}")
+        return None
+
+def read_tide_header(file_path):
+    """Header metadata of a NOAA text export, without reading the data block"""
+    lines = []
+    with open(file_path, 'r') as file:
+        for line in file:
+            if re.match(r'\d{4}/\d{2}/\d{2}', line):
+                break
+            lines.append(line)
+    return _read_header(''.join(lines))[0]
+
+def station_keys():
+    """Every station that can be queried: file stations, then subordinate ones"""
+    return list(STATION_FILES) + [s for s in SUBORDINATE_STATIONS if s not in STATION_FILES]
+
+def station_model(station):
+    """tide_offsets.station_model() of a station's header, plus 'station' and 'source_file'"""
+    if station in STATION_FILES:
+        arrays = tide_arrays(station)
+        if arrays is None:
+            return None
+        metadata = arrays['metadata']
+    elif station in SUBORDINATE_STATIONS:
+        metadata = SUBORDINATE_STATIONS[station]['metadata']
+    else:
+        return None
+    model = tide_offsets.station_model(metadata)
+    model['station'] = station
+    model['source_file'] = STATION_FILES.get(station)
+    if model['reference'] is not None:
+        model['reference']['station'] = SUBORDINATE_STATIONS.get(station, {}).get('reference') or _station_with_id(model['reference']['id'])
+    return model
+
+def _station_with_id(station_id):
+    """Key of the file station whose header has this Stationid, or None"""
+    for station in STATION_FILES:
+        arrays = tide_arrays(station)
+        if arrays is not None and arrays['metadata'].get('Stationid') == station_id:
+            return station
+    return None
+
+def register_subordinate_station(station, reference, offsets, metadata=None):
+    """
+    Serve station from the events of the reference station (a key of STATION_FILES or
+    SUBORDINATE_STATIONS) instead of a file. offsets as returned by
+    tide_offsets.parse_offsets(); metadata holds header fields such as StationName.
+    """
+    metadata = dict(metadata or {})
+    metadata.setdefault('Prediction Type', 'Subordinate')
+    metadata['Units'] = 'Metric'  # Derived heights are in metres
+    for kind in ('high', 'low'):
+        op, value = offsets[f'height_{kind}']
+        metadata[f'HeightOffset{kind.title()}'] = f'{op} {value:g}' if op == '*' else f'{value:+g}'
+        metadata[f'TimeOffset{kind.title()}'] = str(offsets[f'time_{kind}'])
+    SUBORDINATE_STATIONS[station] = {'reference': reference, 'offsets': offsets, 'metadata': metadata}
+
+def register_subordinate_from_header(station, file_path, reference=None):
+    """
+    Register a subordinate station from the header of its NOAA export; only the
+    header is read. The reference defaults to the file station whose Stationid
+    matches ReferencedToStationId.
+    """
+    metadata = read_tide_header(file_path)
+    offsets = tide_offsets.parse_offsets(metadata)
+    if offsets is None:
+        raise ValueError(f"{file_path} has no subordinate station offsets")
+    reference = reference or _station_with_id(metadata.get('ReferencedToStationId'))
+    if reference is None:
+        raise ValueError(f"Reference station {metadata.get('ReferencedToStationId')} of {file_path} is not loaded")
+    keep = ('StationName', 'State', 'Stationid', 'ReferencedToStationName', 'ReferencedToStationId',
+            'Time Zone', 'Datum', 'Interval Type')
+    register_subordinate_station(station, reference, offsets, {k: metadata[k] for k in keep if k in metadata})
+
+def _subordinate_arrays(station, reference_arrays, lo=0, hi=None):
+    """Events lo:hi of the reference station converted to the subordinate station"""
+    entry = SUBORDINATE_STATIONS[station]
+    hi = len(reference_arrays['times']) if hi is None else hi
+    times, heights, types = tide_offsets.apply_offsets(reference_arrays['times'][lo:hi],
+                                                       reference_arrays['heights'][lo:hi],
+                                                       reference_arrays['types'][lo:hi], entry['offsets'])
+    for values in (times, heights, types):
+        values.flags.writeable = False
+    return {
+        'times': times,
+        'heights': heights,
+        'types': types,
+        'metadata': {**reference_arrays['metadata'], 'Stationid': None, 'StationName': None,
+                     **entry['metadata']},
+        'malformed': {'count': 0, 'examples': []},
+        'station': station,
+        'reference': entry['reference']
+    }
+
+# Compiled per-station arrays, shared between processes through the page cache.
+# Set TIDE_CACHE_DIR to an empty string to always parse the source files.
+TIDE_CACHE_DIR = os.getenv('TIDE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.tide_cache'))
+# Bump when the arrays read_tide_file() returns change, to invalidate existing cache files
+_CACHE_VERSION = 1
+
+def _source_digest(file_path):
+    digest = hashlib.sha256(f'v{_CACHE_VERSION}:'.encode())
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def _cache_path(file_path, digest, cache_dir):
+    return os.path.join(cache_dir, f'{os.path.basename(file_path)}.{digest}.npy')
+
+def _write_cache(arrays, path):
+    """
+    Save the arrays as a single record whose fields are the whole columns, so each
+    column is one contiguous block of the file and can be used straight from a memory map
+    """
+    n = len(arrays['times'])
+    header = json.dumps({'metadata': arrays['metadata'], 'malformed': arrays['malformed']}).encode()
+    record = np.zeros((), dtype=[('times', 'datetime64[m]', (n,)), ('heights', np.float64, (n,)),
+                                 ('types', 'U1', (n,)), ('header', f'S{max(len(header), 1)}')])
+    record['times'] = arrays['times']
+    record['heights'] = arrays['heights']
+    record['types'] = arrays['types']
+    record['header'] = header
     
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        np.save(f, record)
+    os.replace(temporary, path)  # Atomic, so concurrent workers never see a partial file
+
+def _load_cache(path):
+    record = np.load(path, mmap_mode='r')
+    header = json.loads(bytes(record['header']))
+    return {
+        'times': np.asarray(record['times']),
+        'heights': np.asarray(record['heights']),
+        'types': np.asarray(record['types']),
+        'metadata': header['metadata'],
+        'malformed': header['malformed']
+    }
+
+def load_tide_file(file_path, cache_dir=None):
+    """
+    read_tide_file() through the binary cache: the arrays are loaded memory-mapped
+    from <cache_dir>/<file name>.<source hash>.npy, which is written on first use.
+    Falls back to parsing when the cache is disabled or cannot be written.
+    """
+    cache_dir = TIDE_CACHE_DIR if cache_dir is None else cache_dir
+    if not cache_dir:
+        return read_tide_file(file_path)
     try:
-        with open(file_path, 'r') as file:
-            lines = file.readlines()
+        digest = _source_digest(file_path)
     except FileNotFoundError:
         print(f"File not found: {file_path}")
+        return None
+    
+    path = _cache_path(file_path, digest, cache_dir)
+    try:
+        return _load_cache(path)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Ignoring unreadable tide cache {path}: {e}")
+    
+    arrays = read_tide_file(file_path)
+    if arrays is None:
+        return None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_cache(arrays, path)
+        for stale in glob.glob(_cache_path(file_path, '*', cache_dir)):
+            if stale != path:
+                os.remove(stale)
+        return _load_cache(path)
+    except OSError as e:
+        print(f"⚠️ Could not write tide cache {path}: {e}")
+        return arrays
+
+# Parsed arrays per station, keyed by file path and mtime so edited files are re-read
+_station_cache = {}
+_station_cache_lock = threading.Lock()
+
+def tide_arrays(station):
+    """
+    read_tide_file() output for a station (plus 'station', its daily and monthly
+    'rollups' and the per-type 'event_index'), loaded once per process through the binary cache (load_tide_file)
+    and shared read-only by the slicing and statistics functions. None if unknown.
+    """
+    file_path = STATION_FILES.get(station)
+    if file_path is None:
+        if station not in SUBORDINATE_STATIONS:
+            return None
+        # Derived once per loaded reference series
+        reference = tide_arrays(SUBORDINATE_STATIONS[station]['reference'])
+        if reference is None:
+            return None
+        cached = _station_cache.get(station)
+        if cached is None or cached[0] is not reference:
+            arrays = _subordinate_arrays(station, reference)
+            arrays['rollups'] = build_rollups(arrays)
+            arrays['event_index'] = build_event_index(arrays)
+            cached = (reference, arrays)
+            _station_cache[station] = cached
+        return cached[1]
+    try:
+        key = (file_path, os.path.getmtime(file_path))
+    except OSError:
+        key = None
+    
+    cached = _station_cache.get(station)
+    if key is not None and cached is not None and cached[0] == key:
+        return cached[1]
+    with _station_cache_lock:
+        cached = _station_cache.get(station)
+        if key is None or cached is None or cached[0] != key:
+            arrays = load_tide_file(file_path)
+            if arrays is not None:
+                arrays['station'] = station
+                arrays['rollups'] = build_rollups(arrays)
+                arrays['event_index'] = build_event_index(arrays)
+            if key is None:
+                return arrays
+            cached = (key, arrays)
+            _station_cache[station] = cached
+    return cached[1]
+
+def _rollup(arrays, unit):
+    """
+    One row per calendar period (unit 'D' or 'M') that has events, as columns:
+    period, highs, lows, sum_high, sum_low, max_high, min_low, and the event indices
+    of the highest high and lowest low (-1 when the period has none)
+    """
+    times = arrays['times']
+    heights = arrays['heights']
+    is_high = arrays['types'] == 'H'
+    periods = times.astype(f'datetime64[{unit}]')
+    if len(times) == 0:
+        return {'period': periods, 'highs': np.zeros(0, np.int64), 'lows': np.zeros(0, np.int64),
+                'sum_high': np.zeros(0), 'sum_low': np.zeros(0), 'max_high': np.zeros(0), 'min_low': np.zeros(0),
+                'max_high_index': np.zeros(0, np.int64), 'min_low_index': np.zeros(0, np.int64)}
+    
+    # Events are sorted, so each period is one contiguous run starting at starts[i]
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(times)]))
+    high_key = np.where(is_high, heights, -np.inf)
+    low_key = np.where(is_high, np.inf, heights)
+    max_high = np.maximum.reduceat(high_key, starts)
+    min_low = np.minimum.reduceat(low_key, starts)
+    
+    def first_match(matches):
+        # First event of each run equal to the run's extreme (every run has one)
+        positions = np.flatnonzero(matches)
+        return positions[np.searchsorted(group[positions], np.arange(len(starts)))]
+    
+    max_high_index = first_match(high_key == max_high[group])
+    min_low_index = first_match(low_key == min_low[group])
+    highs = np.add.reduceat(is_high.astype(np.int64), starts)
+    lows = np.diff(np.r_[starts, len(times)]) - highs
+    return {
+        'period': periods[starts],
+        'highs': highs,
+        'lows': lows,
+        'sum_high': np.add.reduceat(np.where(is_high, heights, 0.0), starts),
+        'sum_low': np.add.reduceat(np.where(is_high, 0.0, heights), starts),
+        'max_high': max_high,
+        'min_low': min_low,
+        'max_high_index': np.where(highs > 0, max_high_index, -1),
+        'min_low_index': np.where(lows > 0, min_low_index, -1)
+    }
+
+def build_rollups(arrays):
+    """Daily and monthly rollup tables of a station's events (see _rollup)"""
+    return {'daily': _rollup(arrays, 'D'), 'monthly': _rollup(arrays, 'M')}
+
+def _rollup_rows(rollups, from_date, to_date):
+    """
+    (table, rows) slices covering the days from_date..to_date: monthly rows for
+    whole months and daily rows for the partial months at either end
+    """
+    start = np.datetime64(from_date, 'D')
+    stop = np.datetime64(to_date, 'D') + 1
+    first_month = start.astype('datetime64[M]')
+    if first_month.astype('datetime64[D]') != start:
+        first_month += 1
+    last_month = stop.astype('datetime64[M]')  # Exclusive
+    
+    daily, monthly = rollups['daily'], rollups['monthly']
+    if first_month >= last_month:
+        spans = [(daily, start, stop)]
+    else:
+        spans = [(daily, start, first_month.astype('datetime64[D]')),
+                 (monthly, first_month, last_month),
+                 (daily, last_month.astype('datetime64[D]'), stop)]
+    rows = []
+    for table, begin, end in spans:
+        lo, hi = np.searchsorted(table['period'], [begin, end])
+        if hi > lo:
+            rows.append((table, slice(lo, hi)))
+    return rows
+
+def rollup_summary(rows):
+    """
+    Reduce rollup rows ((table, slice or index array) pairs, see _rollup_rows) to
+    {'highs', 'lows', 'mean_high', 'mean_low', 'mean_level', 'highest_index',
+    'lowest_index'}, or None when there is no high or no low
+    """
+    def column(name):
+        return np.concatenate([table[name][index] for table, index in rows]) if rows else np.zeros(0)
+    
+    highs = int(column('highs').sum())
+    lows = int(column('lows').sum())
+    if highs == 0 or lows == 0:
+        return None
+    max_high = column('max_high')
+    min_low = column('min_low')
+    sum_high = column('sum_high').sum()
+    sum_low = column('sum_low').sum()
+    return {
+        'highs': highs,
+        'lows': lows,
+        'mean_high': float(sum_high / highs),
+        'mean_low': float(sum_low / lows),
+        'mean_level': float((sum_high + sum_low) / (highs + lows)),
+        'highest_index': int(column('max_high_index')[max_high.argmax()]),
+        'lowest_index': int(column('min_low_index')[min_low.argmin()])
+    }
+
+def station_tide_summary(station, month=None):
+    """
+    Highest high, lowest low and mean level of a station over its whole record, or
+    over that calendar month (1-12) of every year, reduced from the monthly rollup:
+    {'highest': record, 'lowest': record, 'mean_level', 'mean_high', 'mean_low',
+    'events'}. None if the station has no data for it.
+    """
+    arrays = tide_arrays(station)
+    if arrays is None:
+        return None
+    monthly = arrays['rollups']['monthly']
+    if month is None:
+        index = slice(None)
+    else:
+        index = np.flatnonzero((monthly['period'] - monthly['period'].astype('datetime64[Y]')).astype(np.int64) + 1 == month)
+    summary = rollup_summary([(monthly, index)])
+    if summary is None:
+        return None
+    return {
+        'highest': _records(arrays, summary['highest_index'], summary['highest_index'] + 1)[0],
+        'lowest': _records(arrays, summary['lowest_index'], summary['lowest_index'] + 1)[0],
+        'mean_level': summary['mean_level'],
+        'mean_high': summary['mean_high'],
+        'mean_low': summary['mean_low'],
+        'events': summary['highs'] + summary['lows']
+    }
+
+def build_event_index(arrays):
+    """{'H': (indices, times), 'L': (indices, times)}: the sorted times of each event type"""
+    index = {}
+    for kind in ('H', 'L'):
+        positions = np.flatnonzero(arrays['types'] == kind)
+        index[kind] = (positions, arrays['times'][positions])
+    return index
+
+def station_now(station):
+    """Current local clock time at a station as datetime64[m]"""
+    zone = ZoneInfo(STATION_TIME_ZONES.get(station, DEFAULT_TIME_ZONE))
+    return np.datetime64(datetime.now(zone).replace(tzinfo=None), 'm')
+
+def _kind(kind):
+    """'H', 'L' or None (either) from 'H'/'high'/'L'/'low'/None"""
+    if kind is None or str(kind).lower() in ('', 'any', 'either'):
+        return None
+    value = str(kind).strip().upper()[:1]
+    if value not in ('H', 'L'):
+        raise ValueError(f"Unknown tide kind {kind!r}; use 'high' or 'low'")
+    return value
+
+def _covers(arrays, start, stop):
+    """Whether the file's days cover the datetime64[m] span [start, stop]"""
+    times = arrays['times']
+    return (len(times) > 0 and start >= times[0].astype('datetime64[D]')
+            and stop < times[-1].astype('datetime64[D]') + 1)
+
+def _positions_between(arrays, start, stop, kind):
+    """Indices of the events of a kind (or all) with start <= time < stop, by binary search"""
+    if kind is None:
+        lo, hi = np.searchsorted(arrays['times'], [start, stop])
+        return np.arange(lo, hi)
+    positions, kind_times = arrays['event_index'][kind] if 'event_index' in arrays else build_event_index(arrays)[kind]
+    lo, hi = np.searchsorted(kind_times, [start, stop])
+    return positions[lo:hi]
+
+def upcoming_events(station, after=None, kind=None, count=1):
+    """
+    The next count high ('high'/'H'), low ('low'/'L') or any waters strictly after
+    `after` (a datetime or ISO string in station local time; default now), as records.
+    An O(log n) search of the station's event index; past the end of the file the
+    harmonic predictions are searched. None for an unknown station.
+    """
+    arrays = tide_arrays(station)
+    if arrays is None:
+        return None
+    kind = _kind(kind)
+    after = station_now(station) if after is None else np.datetime64(after, 'm')
+    start = after + np.timedelta64(1, 'm')
+    
+    if _covers(arrays, start, start):
+        if kind is None:
+            positions = np.arange(np.searchsorted(arrays['times'], start), len(arrays['times']))[:count]
+        else:
+            positions, kind_times = arrays['event_index'][kind]
+            positions = positions[np.searchsorted(kind_times, start):][:count]
+        if len(positions) == count:
+            return _records(arrays, positions)
+    
+    # Past the end of the file: a window of predicted days long enough for count events
+    days = int(np.ceil(count / (2 if kind else 4))) + 2
+    first_day = start.astype('datetime64[D]')
+    events, lo, hi = _events(station, first_day.astype(object), (first_day + days).astype(object))
+    positions = lo + _positions_between({k: v[lo:hi] for k, v in events.items() if k in ('times', 'types')},
+                                        start, np.datetime64('9999-01-01T00:00'), kind)
+    return _records(events, positions[:count])
+
+def next_event(station, after=None, kind=None):
+    """The first high, low or either event after `after` (default now), or None"""
+    events = upcoming_events(station, after, kind, 1)
+    return events[0] if events else None
+
+def events_between(station, start, stop, kind=None):
+    """
+    Records of the high, low or all events with start <= time < stop (datetimes or ISO
+    strings, station local time): O(log n + k) inside the file, harmonic predictions
+    outside it. None for an unknown station.
+    """
+    arrays = tide_arrays(station)
+    if arrays is None:
+        return None
+    kind = _kind(kind)
+    start, stop = np.datetime64(start, 'm'), np.datetime64(stop, 'm')
+    if stop <= start:
         return []
+    if _covers(arrays, start, stop - np.timedelta64(1, 'm')):
+        return _records(arrays, _positions_between(arrays, start, stop, kind))
     
-    # Determine units from header
-    units = 'Metric'  # Default
-    for line in lines:
-        if 'Units:' in line:
-            units = line.split('Units:')[1].strip()
-            break
-    
-    # Skip header lines and find data section
-    data_started = False
-    for line in lines:
-        line = line.strip()
-        
-        # Skip header lines
-        if line.startswith('Date') or line.startswith('NOAA') or line.startswith('Disclaimer'):
-            continue
-            
-        # Skip empty lines
-        if not line:
-            continue
-            
-        # Check if this is a data line (contains date and time)
-        if re.match(r'\d{4}/\d{2}/\d{2}', line):
-            data_started = True
-            parts = line.split('\t')
-            if len(parts) >= 4:
-                date_str = parts[0].strip()
-                day = parts[1].strip()
-                time_str = parts[2].strip()
-                pred_str = parts[3].strip()
-                high_low = parts[4].strip() if len(parts) > 4 else 'H'
-                
-                try:
-                    # Parse date and time
-                    date_obj = datetime.strptime(date_str, '%Y/%m/%d')
-                    time_obj = datetime.strptime(time_str, '%I:%M %p')
-                    
-                    # Combine date and time
-                    full_datetime = datetime.combine(date_obj.date(), time_obj.time())
-                    
-                    # Convert prediction to float
-                    prediction = float(pred_str)
-                    
-                    # Convert feet to meters if needed
-                    if units == 'Feet':
-                        prediction = prediction * 0.3048  # Convert feet to meters
-                    
-                    tide_data.append({
-                        'datetime': full_datetime.isoformat(),
-                        'date': date_str,
-                        'time': time_str,
-                        'day': day,
-                        'prediction': prediction,
-                        'type': high_low,  # H for high, L for low
-                        'units': 'meters'  # Always convert to meters for consistency
-                    })
-                except ValueError as e:
-                    print(f"Error parsing line: {line} - {e}")
-                    continue
-    
-    return tide_data
+    last_day = (stop - np.timedelta64(1, 'm')).astype('datetime64[D]')
+    events, lo, hi = _events(station, start.astype('datetime64[D]').astype(object), last_day.astype(object))
+    window = {k: v[lo:hi] for k, v in events.items() if k in ('times', 'types')}
+    return _records(events, lo + _positions_between(window, start, stop, kind))
+
+def preload_stations(stations=None):
+    """Parse every station up front (e.g. in the WSGI master before forking workers)"""
+    loaded = {}
+    for station in stations or station_keys():
+        arrays = tide_arrays(station)
+        loaded[station] = 0 if arrays is None else len(arrays['times'])
+    return loaded
+
+def fit_station_constituents(station):
+    """Harmonic constants fitted to a station's NOAA events (see tide_harmonics.fit_constituents)"""
+    arrays = tide_arrays(station)
+    if arrays is None or len(arrays['times']) == 0:
+        return None
+    table = tide_harmonics.fit_constituents(arrays['times'], arrays['heights'], arrays['types'],
+                                            time_zone=arrays['metadata'].get('Time Zone', 'LST_LDT'))
+    if table is not None:
+        table.update(_fit_source(arrays))
+        table['station_id'] = arrays['metadata'].get('Stationid')
+    return table
+
+def _fit_source(arrays):
+    """Fields identifying the events a table was fitted to"""
+    return {
+        'first_event': str(arrays['times'][0]),
+        'last_event': str(arrays['times'][-1]),
+        'events': int(len(arrays['times']))
+    }
+
+# Harmonic constants per station, keyed by the parsed arrays they describe
+_constituent_cache = {}
+
+def station_constituents(station):
+    """
+    Harmonic constants of a station: the entry in HighTide/constituents.json when it
+    was fitted to the current file, otherwise fitted from the file once per process
+    """
+    arrays = tide_arrays(station)
+    if arrays is None or len(arrays['times']) == 0:
+        return None
+    cached = _constituent_cache.get(station)
+    if cached is not None and cached[0] is arrays:
+        return cached[1]
+    
+    table = tide_harmonics.load_tables().get(station)
+    if table is None or any(table.get(k) != v for k, v in _fit_source(arrays).items()):
+        table = fit_station_constituents(station)
+    _constituent_cache[station] = (arrays, table)
+    return table
+
+# Most days of harmonic predictions one range may need (the dense 6-minute curve costs ~1 ms/day)
+MAX_PREDICTION_DAYS = 3660
+
+def _events(station, from_date, to_date):
+    """
+    (arrays, lo, hi): the station's events from the start of from_date to the end of
+    to_date. Days outside the NOAA file are filled with harmonic predictions, in which
+    case arrays is a new dict of the range's events with 'source' set to 'harmonic'
+    (or 'noaa+harmonic') and the 'constituents' used; ValueError if that needs more
+    than MAX_PREDICTION_DAYS days of predictions. (None, 0, 0) for an unknown station.
+    """
+    if station not in STATION_FILES and station in SUBORDINATE_STATIONS:
+        # Offsets shift events by at most a few hours, so a day either side covers them
+        reference, lo, hi = _events(SUBORDINATE_STATIONS[station]['reference'],
+                                    from_date - timedelta(days=1), to_date + timedelta(days=1))
+        if reference is None:
+            return None, 0, 0
+        arrays = _subordinate_arrays(station, reference, lo, hi)
+        arrays['source'] = reference.get('source', 'noaa')
+        lo, hi = _day_range(arrays, from_date, to_date)
+        return arrays, lo, hi
+    
+    arrays = tide_arrays(station)
+    if arrays is None:
+        return None, 0, 0
+    lo, hi = _day_range(arrays, from_date, to_date)
+    start = np.datetime64(from_date, 'D')
+    stop = np.datetime64(to_date, 'D') + 1
+    times = arrays['times']
+    if len(times) and start >= times[0].astype('datetime64[D]') and stop <= times[-1].astype('datetime64[D]') + 1:
+        return arrays, lo, hi
+    
+    table = station_constituents(station)
+    if table is None:
+        return arrays, lo, hi
+    predicted_days = int((stop - start) / np.timedelta64(1, 'D'))
+    if len(times):
+        first_day, last_day = times[0].astype('datetime64[D]'), times[-1].astype('datetime64[D]') + 1
+        predicted_days -= max(0, int((min(stop, last_day) - max(start, first_day)) / np.timedelta64(1, 'D')))
+    if predicted_days > MAX_PREDICTION_DAYS:
+        raise ValueError(f"Ranges outside the NOAA files are limited to {MAX_PREDICTION_DAYS} days of harmonic predictions")
+    predicted_times, predicted_heights, predicted_types = tide_harmonics.predict_extremes(table, start, stop)
+    if len(times):
+        # Keep the NOAA events for the days the file covers
+        covered = ((predicted_times >= times[0].astype('datetime64[D]'))
+                   & (predicted_times < times[-1].astype('datetime64[D]') + 1))
+        predicted_times = predicted_times[~covered]
+        predicted_heights = predicted_heights[~covered]
+        predicted_types = predicted_types[~covered]
+    
+    merged_times = np.concatenate([times[lo:hi], predicted_times])
+    order = np.argsort(merged_times, kind='stable')
+    merged = {
+        'times': merged_times[order],
+        'heights': np.concatenate([arrays['heights'][lo:hi], np.round(predicted_heights, 3)])[order],
+        'types': np.concatenate([arrays['types'][lo:hi], predicted_types])[order],
+        'metadata': arrays['metadata'],
+        'station': station,
+        'source': 'harmonic' if lo == hi else 'noaa+harmonic',
+        'constituents': table
+    }
+    return merged, 0, len(merged_times)
+
+def _day_range(arrays, from_date, to_date):
+    """Index range [lo, hi) of the events from the start of from_date to the end of to_date"""
+    start = np.datetime64(from_date, 'D').astype('datetime64[m]')
+    stop = (np.datetime64(to_date, 'D') + 1).astype('datetime64[m]')
+    lo, hi = np.searchsorted(arrays['times'], [start, stop])
+    return int(lo), int(hi)
+
+def _records(arrays, lo, hi=None):
+    """
+    Events lo:hi as the per-record dicts returned by parse_tide_data, or with hi
+    omitted the events at the index array lo
+    """
+    index = slice(lo, hi) if hi is not None else np.asarray(lo, dtype=np.int64)
+    if (hi is not None and hi <= lo) or (hi is None and len(index) == 0):
+        return []
+    times = arrays['times'][index]
+    days = times.astype('datetime64[D]')
+    minute_of_day = (times - days).astype(np.int64)
+    columns = zip(
+        np.datetime_as_string(times, unit='s').tolist(),
+        np.char.replace(np.datetime_as_string(days), '-', '/').tolist(),
+        CLOCK_LABELS[minute_of_day].tolist(),
+        WEEKDAYS[days.astype(np.int64) % 7].tolist(),
+        arrays['heights'][index].tolist(),
+        arrays['types'][index].tolist()
+    )
+    return [{
+        'datetime': iso,
+        'date': date,
+        'time': time,
+        'day': day,
+        'prediction': prediction,
+        'type': high_low,  # H for high, L for low
+        'units': 'meters'  # Always convert to meters for consistency
+    } for iso, date, time, day, prediction, high_low in columns]
+
+def parse_tide_data(station):
+    """Parse tide data from NOAA text file for specified station"""
+    arrays = tide_arrays(station)
+    if arrays is None:
+        return []
+    return _records(arrays, 0, len(arrays['times']))
+
+def datetime_features(values):
+    """
+    Calendar columns for a datetime64 array, computed with integer arithmetic on
+    the array in one pass (date strings are only formatted once per distinct day)
+    """
+    values = np.asarray(values, dtype='datetime64[m]')
+    days = values.astype('datetime64[D]')
+    months = values.astype('datetime64[M]')
+    years = values.astype('datetime64[Y]')
+    minute_of_day = (values - days).astype(np.int64)
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    
+    return {
+        'date': np.datetime_as_string(unique_days)[day_index],
+        'time': _TIME_LABELS[minute_of_day],
+        'year': (years.astype(np.int64) + 1970).astype(np.int16),
+        'month': ((months - years).astype(np.int64) + 1).astype(np.int8),
+        'day': ((days - months).astype(np.int64) + 1).astype(np.int8),
+        'hour': (minute_of_day // 60).astype(np.int8),
+        'minute': (minute_of_day % 60).astype(np.int8)
+    }
+
+def tide_dataframe(stations=None):
+    """
+    Tide events of several stations as one DataFrame with calendar features,
+    shaped for the MindsDB loader and the SQL sinks in data_sinks.py
+    """
+    if stations is None:
+        stations = station_keys()
+    
+    loaded = [(station, tide_arrays(station)) for station in stations]
+    loaded = [(station, arrays) for station, arrays in loaded if arrays is not None]
+    times = np.concatenate([arrays['times'] for _, arrays in loaded] or [np.array([], 'datetime64[m]')])
+    counts = [len(arrays['times']) for _, arrays in loaded]
+    
+    features = datetime_features(times)
+    return pd.DataFrame({
+        'date': features['date'],
+        'time': features['time'],
+        'day': features['day'],
+        'prediction': np.concatenate([arrays['heights'] for _, arrays in loaded] or [np.array([])]),
+        'type': pd.Categorical(np.concatenate([arrays['types'] for _, arrays in loaded] or [np.array([], 'U1')]),
+                               categories=['H', 'L']),
+        'units': pd.Categorical(np.repeat('meters', len(times))),
+        'station': pd.Categorical.from_codes(
+            np.repeat([list(stations).index(station) for station, _ in loaded], counts).astype(np.int16),
+            categories=list(stations)),
+        'year': features['year'],
+        'month': features['month'],
+        'hour': features['hour'],
+        'minute': features['minute']
+    })
 
 def parse_port_jefferson_data():
     """Parse Port Jefferson tide data from the NOAA text file (legacy function)"""
     return parse_tide_data('portjefferson')
 
-def get_tide_predictions_for_date(target_date_str, station='portjefferson'):
-    """Get tide predictions for a specific date and station"""
-    tide_data = parse_tide_data(station)
-    
-    # Convert target date string to datetime object
+def _parse_date(date_str):
     try:
-        target_date = datetime.strptime(target_date_str, '%Y-%m-%d').date()
+        return datetime.strptime(date_str, '%Y-%m-%d').date()
     except ValueError:
+        return None
+
+def _extremes(arrays, lo, hi):
+    """Indices of the highest high and lowest low in lo:hi, or None if either type is missing"""
+    heights = arrays['heights'][lo:hi]
+    types = arrays['types'][lo:hi]
+    highs = np.flatnonzero(types == 'H')
+    lows = np.flatnonzero(types == 'L')
+    if len(highs) == 0 or len(lows) == 0:
+        return None
+    return lo + highs[heights[highs].argmax()], lo + lows[heights[lows].argmin()], highs + lo, lows + lo
+
+def _event_summary(arrays, lo, hi):
+    """rollup_summary() computed from the events lo:hi themselves"""
+    extremes = _extremes(arrays, lo, hi)
+    if extremes is None:
+        return None
+    highest, lowest, highs, lows = extremes
+    heights = arrays['heights']
+    return {
+        'highs': len(highs),
+        'lows': len(lows),
+        'mean_high': float(heights[highs].mean()),
+        'mean_low': float(heights[lows].mean()),
+        'highest_index': int(highest),
+        'lowest_index': int(lowest)
+    }
+
+@timed_stage('tide_slice')
+def get_tide_predictions_for_date(target_date_str, station='portjefferson'):
+    """Get tide predictions for a specific date and station"""
+    target_date = _parse_date(target_date_str)
+    if target_date is None:
         return []
     
-    # Filter data for the target date
-    daily_predictions = []
-    for entry in tide_data:
-        entry_date = datetime.fromisoformat(entry['datetime']).date()
-        if entry_date == target_date:
-            daily_predictions.append(entry)
-    
-    # Sort by time
-    daily_predictions.sort(key=lambda x: x['time'])
-    
-    return daily_predictions
+    # Events are sorted by time, so the day is one contiguous slice
+    arrays, lo, hi = _events(station, target_date, target_date)
+    if arrays is None:
+        return []
+    return _records(arrays, lo, hi)
 
+@timed_stage('tide_slice')
 def generate_24_hour_tide_data(target_date_str, station='portjefferson'):
     """Generate 24-hour tide data with interpolated values for smooth charting"""
-    daily_predictions = get_tide_predictions_for_date(target_date_str, station)
-    
-    if not daily_predictions:
+    target_date = _parse_date(target_date_str)
+    if target_date is None:
         return None
     
-    # Create 24-hour data points
-    hours = []
-    heights = []
-    times = []
-    
-    # Get the target date
-    target_date = datetime.strptime(target_date_str, '%Y-%m-%d').date()
+    arrays, lo, hi = _events(station, target_date, target_date)
+    if arrays is None or lo == hi:
+        return None
     
-    # Create 24-hour timeline
-    for hour in range(24):
-        current_time = datetime.combine(target_date, datetime.min.time().replace(hour=hour))
-        hours.append(hour)
-        times.append(current_time.strftime('%I:%M %p'))
-        
-        # Find the closest tide prediction for this hour
-        closest_prediction = None
-        min_time_diff = float('inf')
-        
-        for pred in daily_predictions:
-            pred_time = datetime.strptime(pred['time'], '%I:%M %p').time()
-            pred_datetime = datetime.combine(target_date, pred_time)
-            
-            time_diff = abs((current_time - pred_datetime).total_seconds() / 3600)
-            
-            if time_diff < min_time_diff:
-                min_time_diff = time_diff
-                closest_prediction = pred['prediction']
-        
-        # Use the closest prediction or interpolate
-        if closest_prediction is not None:
-            heights.append(closest_prediction)
-        else:
-            # Fallback to a base tide height
-            heights.append(1.5)
+    hour_minutes = np.arange(24) * 60
+    if 'constituents' in arrays:
+        # Predicted day: sample the harmonic curve itself
+        hours = np.datetime64(target_date, 'D').astype('datetime64[m]') + hour_minutes
+        heights = np.round(tide_harmonics.predict_levels(arrays['constituents'], hours), 3)
+    else:
+        # Height of the closest tide prediction for each hour of the day
+        times = arrays['times'][lo:hi]
+        event_minutes = (times - times.astype('datetime64[D]')).astype(np.int64)
+        closest = np.abs(hour_minutes[:, None] - event_minutes[None, :]).argmin(axis=1)
+        heights = arrays['heights'][lo:hi][closest]
     
     return {
-        'hours': hours,
-        'heights': heights,
-        'times': times,
-        'predictions': daily_predictions
+        'hours': list(range(24)),
+        'heights': heights.tolist(),
+        'times': CLOCK_LABELS[hour_minutes].tolist(),
+        'predictions': _records(arrays, lo, hi),
+        'source': arrays.get('source', 'noaa')
     }
 
+@timed_stage('tide_stats')
 def get_tide_statistics(target_date_str, station='portjefferson'):
     """Get tide statistics for a specific date"""
-    daily_predictions = get_tide_predictions_for_date(target_date_str, station)
-    
-    if not daily_predictions:
+    target_date = _parse_date(target_date_str)
+    if target_date is None:
         return None
     
-    # Separate high and low tides
-    high_tides = [p for p in daily_predictions if p['type'] == 'H']
-    low_tides = [p for p in daily_predictions if p['type'] == 'L']
-    
-    if not high_tides or not low_tides:
+    arrays, lo, hi = _events(station, target_date, target_date)
+    if arrays is None:
         return None
+    if 'rollups' in arrays:
+        # The day's row of the daily rollup
+        summary = rollup_summary(_rollup_rows(arrays['rollups'], target_date, target_date))
+        if summary is None:
+            return None
+        highest, lowest = summary['highest_index'], summary['lowest_index']
+        types = arrays['types'][lo:hi]
+        highs, lows = lo + np.flatnonzero(types == 'H'), lo + np.flatnonzero(types == 'L')
+    else:
+        extremes = _extremes(arrays, lo, hi)
+        if extremes is None:
+            return None
+        highest, lowest, highs, lows = extremes
     
-    # Find highest and lowest tides
-    highest_tide = max(high_tides, key=lambda x: x['prediction'])
-    lowest_tide = min(low_tides, key=lambda x: x['prediction'])
-    
-    # Calculate tidal range
-    tidal_range = highest_tide['prediction'] - lowest_tide['prediction']
+    highest_tide = _records(arrays, highest, highest + 1)[0]
+    lowest_tide = _records(arrays, lowest, lowest + 1)[0]
+    daily_predictions = _records(arrays, lo, hi)
     
     return {
         'high_tide': {
@@ -191,87 +1036,165 @@ def get_tide_statistics(target_date_str, station='portjefferson'):
             'time': lowest_tide['time'],
             'height': lowest_tide['prediction']
         },
-        'tidal_range': tidal_range,
-        'all_highs': high_tides,
-        'all_lows': low_tides
+        'tidal_range': highest_tide['prediction'] - lowest_tide['prediction'],
+        'all_highs': [daily_predictions[i - lo] for i in highs],
+        'all_lows': [daily_predictions[i - lo] for i in lows]
     }
 
-def generate_date_range_tide_data(from_date_str, to_date_str, station='portjefferson'):
-    """Generate tide data for a date range"""
-    tide_data = parse_tide_data(station)
+def interpolate_levels(times, heights, at):
+    """
+    Water level at the datetime64 values `at` by cosine interpolation between the
+    surrounding high and low waters (times sorted); held flat outside them
+    """
+    event_minutes = np.asarray(times, dtype='datetime64[m]').astype(np.int64)
+    minutes = np.asarray(at, dtype='datetime64[m]').astype(np.int64)
+    heights = np.asarray(heights, dtype=np.float64)
+    if len(event_minutes) < 2:
+        return np.full(len(minutes), heights[0] if len(heights) else np.nan)
     
-    try:
-        from_date = datetime.strptime(from_date_str, '%Y-%m-%d').date()
-        to_date = datetime.strptime(to_date_str, '%Y-%m-%d').date()
-    except ValueError:
-        return None
+    i0 = np.clip(np.searchsorted(event_minutes, minutes, side='right') - 1, 0, len(event_minutes) - 2)
+    t0, t1 = event_minutes[i0], event_minutes[i0 + 1]
+    fraction = np.clip((minutes - t0) / np.maximum(t1 - t0, 1), 0, 1)
+    return heights[i0] + (heights[i0 + 1] - heights[i0]) * (1 - np.cos(np.pi * fraction)) / 2
+
+# Largest chart series generate_date_range_tide_data builds before downsampling
+MAX_SERIES_POINTS = 1_000_000
+
+def _range_series(arrays, lo, hi, interval):
+    """
+    Chart series of the events lo:hi: the events themselves, or with an interval
+    (minutes) a curve sampled every interval minutes with the events merged in.
+    Returns (times, heights, event index or -1 per point).
+    """
+    times = arrays['times'][lo:hi]
+    if not interval:
+        return times, arrays['heights'][lo:hi], np.arange(lo, hi)
+    
+    grid = np.arange(times[0], times[-1], np.timedelta64(int(interval), 'm'))
+    if len(grid) + hi - lo > MAX_SERIES_POINTS:
+        raise ValueError(f"interval {interval} gives more than {MAX_SERIES_POINTS} points; use a larger interval")
+    if 'constituents' in arrays:
+        levels = tide_harmonics.predict_levels(arrays['constituents'], grid)
+    else:
+        # Neighbouring events outside the range bracket its first and last samples
+        first, last = max(lo - 1, 0), min(hi + 1, len(arrays['times']))
+        levels = interpolate_levels(arrays['times'][first:last], arrays['heights'][first:last], grid)
     
-    # Filter data for the date range
-    range_predictions = []
-    for entry in tide_data:
-        entry_date = datetime.fromisoformat(entry['datetime']).date()
-        if from_date <= entry_date <= to_date:
-            range_predictions.append(entry)
+    series_times = np.concatenate([grid, times])
+    order = np.argsort(series_times, kind='stable')
+    series_heights = np.concatenate([np.round(levels, 3), arrays['heights'][lo:hi]])
+    event_index = np.concatenate([np.full(len(grid), -1), np.arange(lo, hi)])
+    return series_times[order], series_heights[order], event_index[order]
+
+def level_curve(station, from_date, to_date, interval=6, endpoint=False):
+    """
+    Water levels every interval minutes from the start of from_date to the end of
+    to_date (dates), closed by midnight after to_date with endpoint (the last step is
+    shorter when interval does not divide the range): the harmonic
+    curve on predicted days, otherwise cosine interpolation between the highs and
+    lows. Returns (times datetime64[m], levels, source), or None if the station is
+    unknown or has no events there.
+    """
+    start = np.datetime64(from_date, 'D')
+    stop = np.datetime64(to_date, 'D') + 1
+    step = np.timedelta64(int(interval), 'm')
+    # Checked before the grid is allocated, so a huge range fails cheaply
+    if int((stop - start) / np.timedelta64(1, 'D')) * 1440 // int(interval) + int(endpoint) > MAX_SERIES_POINTS:
+        raise ValueError(f"interval {interval} gives more than {MAX_SERIES_POINTS} points; use a larger interval")
+    grid = np.arange(start.astype('datetime64[m]'), stop.astype('datetime64[m]'), step)
+    if endpoint:
+        grid = np.append(grid, stop.astype('datetime64[m]'))
     
-    if not range_predictions:
+    arrays, lo, hi = _events(station, from_date, to_date)
+    if arrays is None or hi <= lo:
+        return None
+    source = arrays.get('source', 'noaa')
+    if source == 'harmonic':
+        return grid, tide_harmonics.predict_levels(arrays['constituents'], grid), source
+    if source == 'noaa+harmonic':
+        # Merged events stop at the range; a day either side supplies the events around its ends
+        arrays, lo, hi = _events(station, from_date - timedelta(days=1), to_date + timedelta(days=1))
+    else:
+        lo, hi = max(lo - 1, 0), min(hi + 1, len(arrays['times']))
+    return grid, interpolate_levels(arrays['times'][lo:hi], arrays['heights'][lo:hi], grid), source
+
+@timed_stage('tide_slice')
+def generate_date_range_tide_data(from_date_str, to_date_str, station='portjefferson', max_points=None, interval=None):
+    """
+    Generate tide data for a date range. With interval (minutes) the chart series is a
+    curve sampled at that step between the highs and lows (cosine interpolation, or the
+    harmonic curve for predicted days). With max_points the series is reduced to at most
+    that many points by LTTB, keeping every high and low when they fit; 'predictions'
+    then lists only the events still in the series.
+    """
+    from_date = _parse_date(from_date_str)
+    to_date = _parse_date(to_date_str)
+    if from_date is None or to_date is None:
         return None
     
-    # Sort by datetime
-    range_predictions.sort(key=lambda x: x['datetime'])
+    arrays, lo, hi = _events(station, from_date, to_date)
+    if arrays is None or lo >= hi:
+        return None
     
-    # Extract data for charting
-    dates = []
-    heights = []
-    times = []
+    if not interval and not max_points:
+        range_predictions = _records(arrays, lo, hi)
+        
+        # Extract data for charting ('YYYY/MM/DD' -> 'MM/DD')
+        return {
+            'dates': [p['date'][5:] for p in range_predictions],
+            'heights': [p['prediction'] for p in range_predictions],
+            'times': [p['time'] for p in range_predictions],
+            'predictions': range_predictions,
+            'source': arrays.get('source', 'noaa')
+        }
     
-    for pred in range_predictions:
-        date_obj = datetime.fromisoformat(pred['datetime'])
-        dates.append(date_obj.strftime('%m/%d'))
-        times.append(pred['time'])
-        heights.append(pred['prediction'])
+    times, heights, event_index = _range_series(arrays, lo, hi, interval)
+    minutes = times.astype(np.int64)
+    is_event = event_index >= 0
+    if interval:
+        keep = np.flatnonzero(is_event)
+    else:
+        # Every point is an event: always keep the range's highest and lowest
+        keep = [heights.argmax(), heights.argmin()]
+    selected = downsample(minutes, heights, max_points, keep)
     
+    times, heights, event_index = times[selected], heights[selected], event_index[selected]
+    days = times.astype('datetime64[D]')
+    events = event_index[event_index >= 0]
     return {
-        'dates': dates,
-        'heights': heights,
-        'times': times,
-        'predictions': range_predictions
+        'dates': [d[5:].replace('-', '/') for d in np.datetime_as_string(days).tolist()],
+        'heights': heights.tolist(),
+        'times': CLOCK_LABELS[(times - days).astype(np.int64)].tolist(),
+        'minutes': minutes[selected].tolist(),
+        'predictions': _records(arrays, events),
+        'total_points': int(len(minutes)),
+        'interval': interval,
+        'source': arrays.get('source', 'noaa')
     }
 
+@timed_stage('tide_stats')
 def get_date_range_statistics(from_date_str, to_date_str, station='portjefferson'):
     """Get tide statistics for a date range"""
-    daily_predictions = []
-    tide_data = parse_tide_data(station)
-    
-    try:
-        from_date = datetime.strptime(from_date_str, '%Y-%m-%d').date()
-        to_date = datetime.strptime(to_date_str, '%Y-%m-%d').date()
-    except ValueError:
+    from_date = _parse_date(from_date_str)
+    to_date = _parse_date(to_date_str)
+    if from_date is None or to_date is None:
         return None
     
-    # Filter data for the date range
-    for entry in tide_data:
-        entry_date = datetime.fromisoformat(entry['datetime']).date()
-        if from_date <= entry_date <= to_date:
-            daily_predictions.append(entry)
-    
-    if not daily_predictions:
+    arrays, lo, hi = _events(station, from_date, to_date)
+    if arrays is None or lo >= hi:
         return None
-    
-    # Separate high and low tides
-    high_tides = [p for p in daily_predictions if p['type'] == 'H']
-    low_tides = [p for p in daily_predictions if p['type'] == 'L']
-    
-    if not high_tides or not low_tides:
+    if 'rollups' in arrays:
+        # Whole months come from the monthly rollup, the partial months at the ends from the daily one
+        summary = rollup_summary(_rollup_rows(arrays['rollups'], from_date, to_date))
+    else:
+        summary = _event_summary(arrays, lo, hi)
+    if summary is None:
         return None
-    
-    # Find highest and lowest tides in the range
-    highest_tide = max(high_tides, key=lambda x: x['prediction'])
-    lowest_tide = min(low_tides, key=lambda x: x['prediction'])
+    highest_tide = _records(arrays, summary['highest_index'], summary['highest_index'] + 1)[0]
+    lowest_tide = _records(arrays, summary['lowest_index'], summary['lowest_index'] + 1)[0]
     
     # Calculate average tidal range
-    avg_high = sum(p['prediction'] for p in high_tides) / len(high_tides)
-    avg_low = sum(p['prediction'] for p in low_tides) / len(low_tides)
-    avg_tidal_range = avg_high - avg_low
+    avg_tidal_range = summary['mean_high'] - summary['mean_low']
     
     return {
         'highest_tide': {
@@ -284,12 +1207,45 @@ def get_date_range_statistics(from_date_str, to_date_str, station='portjefferson
             'time': lowest_tide['time'],
             'height': lowest_tide['prediction']
         },
-        'avg_tidal_range': avg_tidal_range,
-        'total_highs': len(high_tides),
-        'total_lows': len(low_tides),
+        'avg_tidal_range': float(avg_tidal_range),
+        'total_highs': summary['highs'],
+        'total_lows': summary['lows'],
         'date_range': f"{from_date_str} to {to_date_str}"
     }
 
+def compact_tide_data(tide_data):
+    """
+    Columnar form of generate_24_hour_tide_data / generate_date_range_tide_data output
+    for the `format=compact` API mode: one array per field instead of per-record dicts.
+    Event times are minutes since 1970-01-01 00:00 in the station's local time, and the
+    chart labels (dates, times, hours) are left for the client to derive. Curves built
+    with an interval are sent as series_minutes / series_heights.
+    """
+    predictions = tide_data['predictions']
+    minutes = np.array([p['datetime'] for p in predictions], dtype='datetime64[m]').astype(np.int64)
+    order = np.argsort(minutes, kind='stable')
+    heights = np.array([p['prediction'] for p in predictions], dtype=np.float64)
+    compact = {
+        'minutes': minutes[order].tolist(),
+        'heights': np.round(heights[order], 3).tolist(),
+        'types': ''.join(predictions[i]['type'] for i in order),
+        'units': 'meters',
+        'source': tide_data.get('source', 'noaa')
+    }
+    if 'hours' in tide_data:
+        compact['hourly_heights'] = np.round(tide_data['heights'], 3).tolist()
+    if 'total_points' in tide_data:
+        compact['total_points'] = tide_data['total_points']
+        if tide_data.get('interval'):
+            # The chart curve, which has more points than the highs and lows
+            compact['series_minutes'] = tide_data['minutes']
+            compact['series_heights'] = np.round(tide_data['heights'], 3).tolist()
+    return compact
+
+def compact_statistics(statistics):
+    """Statistics without the per-record high/low lists (they repeat the event arrays)"""
+    return {k: v for k, v in statistics.items() if k not in ('all_highs', 'all_lows')}
+
 if __name__ == "__main__":
     # Test the parser
     test_date = "2025-06-01"
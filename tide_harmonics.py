@@ -0,0 +1,294 @@
+"""
+Harmonic tide prediction.
+
+A station's water level is modelled as the harmonic sum
+
+    h(t) = z0 + sum_k f_k A_k cos(w_k t + u_k - g_k)
+
+over the constituents in CONSTITUENTS (speed w in degrees per hour), with nodal
+corrections f (amplitude) and u (phase) for the 18.6-year cycle of the Moon's node.
+t is minutes since 1970-01-01 00:00 in local standard time, and the phases g are in
+that convention rather than Greenwich phase lags.
+
+Amplitudes and phases are fitted by least squares to a station's NOAA high/low
+events (fit_constituents) and stored in HighTide/constituents.json, written with
+
+    python tide_harmonics.py
+
+predict_levels() and predict_extremes() then evaluate any time range.
+"""
+
+import json
+import os
+
+import numpy as np
+
+# name -> (speed in degrees per hour, nodal correction group)
+CONSTITUENTS = {
+    'M2': (28.9841042, 'M2'),
+    'S2': (30.0000000, None),
+    'N2': (28.4397295, 'M2'),
+    'K2': (30.0821373, 'K2'),
+    'K1': (15.0410686, 'K1'),
+    'O1': (13.9430356, 'O1'),
+    'P1': (14.9589314, None),
+    'Q1': (13.3986609, 'O1'),
+    'M4': (57.9682084, 'M4'),
+    'MS4': (58.9841042, 'M2'),
+    'MN4': (57.4238337, 'M4'),
+    'M6': (86.9523127, 'M6'),
+}
+# Order in which constituents are admitted to a fit while the record is long enough
+# to separate them (Rayleigh criterion)
+FIT_PRIORITY = ['M2', 'K1', 'S2', 'O1', 'N2', 'M4', 'K2', 'P1', 'Q1', 'MS4', 'MN4', 'M6']
+# Constituents too close to a larger one to resolve from a short record are inferred
+# from it with the equilibrium amplitude ratio and the same phase
+INFERENCE = {'K2': ('S2', 0.272), 'P1': ('K1', 0.331)}
+RAYLEIGH = 1.0
+
+CONSTITUENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'HighTide', 'constituents.json')
+# Timestamps evaluated per matrix product
+PREDICT_CHUNK = 50000
+# Sampling interval (minutes) of the dense curve that extremes are located on
+EXTREMA_STEP = 6
+
+
+def _node_longitude(minutes):
+    """Longitude of the Moon's ascending node (radians) at minutes since 1970-01-01"""
+    days_since_j2000 = np.asarray(minutes, dtype=np.float64) / 1440.0 - 10957.5
+    return np.radians(125.0445 - 0.0529538 * days_since_j2000)
+
+
+def _nodal(minutes, names):
+    """Nodal amplitude factors f and phase corrections u (radians), shape (len(names),) + minutes.shape"""
+    N = _node_longitude(minutes)
+    c1, c2, c3 = np.cos(N), np.cos(2 * N), np.cos(3 * N)
+    s1, s2, s3 = np.sin(N), np.sin(2 * N), np.sin(3 * N)
+    f_m2 = 1.0004 - 0.0373 * c1 + 0.0002 * c2
+    u_m2 = -2.14 * s1
+    groups = {
+        None: (np.ones_like(N), np.zeros_like(N)),
+        'M2': (f_m2, u_m2),
+        'K1': (1.0060 + 0.1150 * c1 - 0.0088 * c2 + 0.0006 * c3, -8.86 * s1 + 0.68 * s2 - 0.07 * s3),
+        'O1': (1.0089 + 0.1871 * c1 - 0.0147 * c2 + 0.0014 * c3, 10.80 * s1 - 1.34 * s2 + 0.19 * s3),
+        'K2': (1.0241 + 0.2863 * c1 + 0.0083 * c2 - 0.0015 * c3, -17.74 * s1 + 0.68 * s2 - 0.04 * s3),
+        'M4': (f_m2 ** 2, 2 * u_m2),
+        'M6': (f_m2 ** 3, 3 * u_m2),
+    }
+    f = np.stack([groups[CONSTITUENTS[name][1]][0] for name in names])
+    u = np.stack([groups[CONSTITUENTS[name][1]][1] for name in names])
+    return f, np.radians(u)
+
+
+def _speeds(names):
+    """Angular speeds in radians per minute"""
+    return np.radians([CONSTITUENTS[name][0] for name in names]) / 60.0
+
+
+def _next_sunday(days):
+    # datetime64[D] day numbers % 7 == 3 are Sundays (1970-01-01 was a Thursday)
+    return days + (3 - days.astype(np.int64)) % 7
+
+
+def _dst_bounds(minutes):
+    """Start and end of US daylight saving time (2007 rules) in local standard minutes, per timestamp's year"""
+    years = np.asarray(minutes, dtype='datetime64[m]').astype('datetime64[Y]')
+    months = years.astype('datetime64[M]')
+    start = _next_sunday((months + 2).astype('datetime64[D]')) + 7  # Second Sunday in March
+    end = _next_sunday((months + 10).astype('datetime64[D]'))  # First Sunday in November
+    # 02:00 LST, and 02:00 LDT = 01:00 LST
+    return start.astype(np.int64) * 1440 + 120, end.astype(np.int64) * 1440 + 60
+
+
+def to_standard(minutes, time_zone):
+    """Local clock minutes (NOAA 'LST_LDT') to local standard minutes"""
+    minutes = np.asarray(minutes, dtype=np.int64)
+    if time_zone != 'LST_LDT':
+        return minutes
+    start, end = _dst_bounds(minutes)
+    return minutes - 60 * ((minutes >= start) & (minutes < end + 60))
+
+
+def to_local(minutes, time_zone):
+    """Local standard minutes to local clock minutes (inverse of to_standard)"""
+    minutes = np.asarray(minutes, dtype=np.int64)
+    if time_zone != 'LST_LDT':
+        return minutes
+    start, end = _dst_bounds(minutes)
+    return minutes + 60 * ((minutes >= start) & (minutes < end))
+
+
+def select_constituents(span_hours, rayleigh=RAYLEIGH):
+    """
+    Constituents resolvable from a record span_hours long, in FIT_PRIORITY order,
+    and the inferred ones as {name: (parent, ratio)}
+    """
+    selected = []
+    for name in FIT_PRIORITY:
+        speed = CONSTITUENTS[name][0]
+        if speed * span_hours < 360 * rayleigh:
+            continue
+        if all(abs(speed - CONSTITUENTS[other][0]) * span_hours >= 360 * rayleigh for other in selected):
+            selected.append(name)
+    inferred = {name: rule for name, rule in INFERENCE.items()
+                if name not in selected and rule[0] in selected}
+    return selected, inferred
+
+
+def _design(minutes, selected, inferred, derivative=False):
+    """
+    Least-squares columns (cosine and sine part per selected constituent, inferred
+    constituents folded into their parent) at the given minutes, or their time
+    derivatives. Shape (len(minutes), 2 * len(selected)).
+    """
+    names = selected + list(inferred)
+    speeds = _speeds(names)
+    f, u = _nodal(minutes, names)
+    theta = speeds[:, None] * minutes[None, :] + u
+    if derivative:
+        cos_part = -f * speeds[:, None] * np.sin(theta)
+        sin_part = f * speeds[:, None] * np.cos(theta)
+    else:
+        cos_part = f * np.cos(theta)
+        sin_part = f * np.sin(theta)
+
+    columns_cos = cos_part[:len(selected)].copy()
+    columns_sin = sin_part[:len(selected)].copy()
+    for i, (parent, ratio) in enumerate(inferred.values(), start=len(selected)):
+        j = selected.index(parent)
+        columns_cos[j] += ratio * cos_part[i]
+        columns_sin[j] += ratio * sin_part[i]
+    return np.concatenate([columns_cos, columns_sin]).T
+
+
+def fit_constituents(times, heights, types=None, time_zone='LST_LDT', rayleigh=RAYLEIGH):
+    """
+    Fit harmonic constants to water levels at times (datetime64, local clock time).
+    When types are given the samples are high/low waters, and the curve is also
+    required to be flat at each of them, which doubles the constraints a high/low
+    record provides.
+
+    Returns the table used by predict_levels(): {'z0', 'time_zone', 'constituents':
+    {name: {'amplitude', 'phase'}}, 'rms_error', 'events', 'span_days'}, or None if
+    the record is too short to fit anything.
+    """
+    minutes = to_standard(np.asarray(times, dtype='datetime64[m]').astype(np.int64), time_zone).astype(np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+    span_hours = (minutes.max() - minutes.min()) / 60 if len(minutes) else 0
+    selected, inferred = select_constituents(span_hours, rayleigh)
+    if not selected or len(minutes) <= 2 * len(selected) + 1:
+        return None
+
+    rows = np.column_stack([np.ones_like(minutes), _design(minutes, selected, inferred)])
+    targets = heights
+    if types is not None:
+        # Slope rows, scaled to metres by the M2 period so both kinds weigh alike
+        scale = 1 / _speeds(['M2'])[0]
+        slopes = np.column_stack([np.zeros_like(minutes), _design(minutes, selected, inferred, derivative=True)])
+        rows = np.vstack([rows, slopes * scale])
+        targets = np.concatenate([heights, np.zeros_like(heights)])
+
+    solution = np.linalg.lstsq(rows, targets, rcond=None)[0]
+    residual = rows[:len(heights)] @ solution - heights
+    a = solution[1:1 + len(selected)]
+    b = solution[1 + len(selected):]
+    amplitudes = np.hypot(a, b)
+    phases = np.degrees(np.arctan2(b, a)) % 360
+
+    constituents = {name: {'amplitude': round(float(amplitude), 5), 'phase': round(float(phase), 3)}
+                    for name, amplitude, phase in zip(selected, amplitudes, phases)}
+    for name, (parent, ratio) in inferred.items():
+        constituents[name] = {'amplitude': round(constituents[parent]['amplitude'] * ratio, 5),
+                              'phase': constituents[parent]['phase'], 'inferred_from': parent}
+    return {
+        'z0': round(float(solution[0]), 5),
+        'time_zone': time_zone,
+        'constituents': constituents,
+        'rms_error': round(float(np.sqrt(np.mean(residual ** 2))), 4),
+        'events': int(len(heights)),
+        'span_days': round(span_hours / 24, 2)
+    }
+
+
+def _evaluate(table, minutes):
+    """Water levels at local standard minutes (float array), one matrix product per chunk"""
+    names = list(table['constituents'])
+    speeds = _speeds(names)
+    amplitudes = np.array([table['constituents'][name]['amplitude'] for name in names])
+    phases = np.radians([table['constituents'][name]['phase'] for name in names])
+
+    levels = np.empty(len(minutes))
+    for start in range(0, len(minutes), PREDICT_CHUNK):
+        chunk = minutes[start:start + PREDICT_CHUNK]
+        # Nodal corrections change over years, so one value per chunk is enough
+        f, u = _nodal(chunk[len(chunk) // 2], names)
+        theta = speeds[:, None] * chunk[None, :] + (u - phases)[:, None]
+        levels[start:start + len(chunk)] = table['z0'] + (f * amplitudes) @ np.cos(theta)
+    return levels
+
+
+def predict_levels(table, times):
+    """Predicted water levels (metres) at times (datetime64, local clock time)"""
+    minutes = np.asarray(times, dtype='datetime64[m]').astype(np.int64)
+    return _evaluate(table, to_standard(minutes, table.get('time_zone')).astype(np.float64))
+
+
+def predict_extremes(table, start, stop, step=EXTREMA_STEP):
+    """
+    High and low waters in [start, stop) (datetime64, local clock time), located on
+    the curve sampled every step minutes and refined with a parabola through each
+    turning point. Returns (times datetime64[m], heights, types 'H'/'L').
+    """
+    time_zone = table.get('time_zone')
+    first, last = to_standard(np.array([start, stop], dtype='datetime64[m]').astype(np.int64), time_zone)
+    grid = np.arange(first - 2 * step, last + 2 * step, step, dtype=np.float64)
+    levels = _evaluate(table, grid)
+
+    slope = np.sign(np.diff(levels))
+    turning = np.flatnonzero(slope[:-1] != slope[1:]) + 1
+    y0, y1, y2 = levels[turning - 1], levels[turning], levels[turning + 1]
+    curvature = y0 - 2 * y1 + y2
+    offset = np.where(curvature != 0, 0.5 * (y0 - y2) / np.where(curvature != 0, curvature, 1), 0)
+    minutes = np.round(grid[turning] + offset * step).astype(np.int64)
+    heights = y1 - 0.25 * (y0 - y2) * offset
+
+    times = to_local(minutes, time_zone).astype('datetime64[m]')
+    keep = (times >= np.datetime64(start, 'm')) & (times < np.datetime64(stop, 'm'))
+    types = np.where(curvature < 0, 'H', 'L')
+    return times[keep], heights[keep], types[keep]
+
+
+def load_tables(path=CONSTITUENTS_FILE):
+    """{station: table} from the constituents file, or {} if it does not exist"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_tables(tables, path=CONSTITUENTS_FILE):
+    with open(path, 'w') as f:
+        json.dump(tables, f, indent=2)
+        f.write('\n')
+
+
+if __name__ == '__main__':
+    import argparse
+    import tide_data_parser
+
+    parser = argparse.ArgumentParser()
+    parser.description = "Fit harmonic constants to the NOAA files in tide_data_parser.STATION_FILES."
+    parser.add_argument('--output', default=CONSTITUENTS_FILE, help='Constituents file to write')
+    args = parser.parse_args()
+
+    tables = {}
+    for station in tide_data_parser.STATION_FILES:
+        table = tide_data_parser.fit_station_constituents(station)
+        if table is None:
+            print(f"⚠️ Not enough data to fit {station}")
+            continue
+        tables[station] = table
+        names = ', '.join(name for name, c in table['constituents'].items() if 'inferred_from' not in c)
+        print(f"✅ {station}: {names} (rms error {table['rms_error']} m over {table['span_days']} days)")
+    save_tables(tables, args.output)
@@ -0,0 +1,85 @@
+"""
+NOAA subordinate stations.
+
+A subordinate station has no harmonic constants of its own. NOAA predicts it from a
+reference station's highs and lows by shifting each by a time offset (minutes) and
+correcting its height, either by a ratio ('* 0.98') or by an additive offset ('+0.3').
+The offsets are given separately for highs and lows, as in the header of
+HighTide/portJeff.txt:
+
+    ReferencedToStationName: Bridgeport
+    ReferencedToStationId: 8467150
+    HeightOffsetLow: * 0.98
+    HeightOffsetHigh: * 0.98
+    TimeOffsetLow: 1
+    TimeOffsetHigh: 2
+    Prediction Type: Subordinate
+"""
+
+import numpy as np
+
+FEET_TO_METERS = 0.3048
+
+
+def parse_height_offset(value, units='Metric'):
+    """('*', ratio) or ('+', metres) from a NOAA height offset such as '* 0.98' or '+0.3'"""
+    text = str(value).strip().replace(' ', '')
+    if text.startswith('*'):
+        return '*', float(text[1:])
+    offset = float(text)
+    return '+', offset * FEET_TO_METERS if units == 'Feet' else offset
+
+
+def parse_offsets(metadata):
+    """Offsets from NOAA header fields, or None if the header has none"""
+    try:
+        units = metadata.get('Units', 'Metric')
+        return {
+            'time_high': int(metadata['TimeOffsetHigh']),
+            'time_low': int(metadata['TimeOffsetLow']),
+            'height_high': parse_height_offset(metadata['HeightOffsetHigh'], units),
+            'height_low': parse_height_offset(metadata['HeightOffsetLow'], units),
+        }
+    except (KeyError, ValueError):
+        return None
+
+
+def station_model(metadata):
+    """
+    Station description from NOAA header fields (text or XML export):
+    {'id', 'name', 'state', 'prediction_type', 'units', 'time_zone', 'datum',
+     'reference': {'id', 'name'} or None, 'offsets': see parse_offsets, or None}
+    """
+    offsets = parse_offsets(metadata)
+    reference_id = metadata.get('ReferencedToStationId')
+    return {
+        'id': metadata.get('Stationid'),
+        'name': metadata.get('StationName'),
+        'state': metadata.get('State'),
+        'prediction_type': metadata.get('Prediction Type', 'Harmonic'),
+        'units': metadata.get('Units', 'Metric'),
+        'time_zone': metadata.get('Time Zone'),
+        'datum': metadata.get('Datum'),
+        'reference': {'id': reference_id, 'name': metadata.get('ReferencedToStationName')} if reference_id else None,
+        'offsets': offsets,
+    }
+
+
+def apply_offsets(times, heights, types, offsets):
+    """
+    Subordinate events from reference events (times datetime64[m], heights in metres,
+    types 'H'/'L'): one vectorized shift and height correction per event type.
+    Returns (times, heights, types) sorted by time.
+    """
+    times = np.asarray(times, dtype='datetime64[m]')
+    heights = np.asarray(heights, dtype=np.float64)
+    is_high = np.asarray(types) == 'H'
+
+    shift = np.where(is_high, offsets['time_high'], offsets['time_low']).astype('timedelta64[m]')
+    (high_op, high_value), (low_op, low_value) = offsets['height_high'], offsets['height_low']
+    ratio = np.where(is_high, high_value if high_op == '*' else 1.0, low_value if low_op == '*' else 1.0)
+    added = np.where(is_high, high_value if high_op == '+' else 0.0, low_value if low_op == '+' else 0.0)
+
+    shifted = times + shift
+    order = np.argsort(shifted, kind='stable')
+    return shifted[order], (heights * ratio + added)[order], np.asarray(types)[order]
@@ -0,0 +1,119 @@
+"""
+Deferred backend initialization.
+
+Slow or network-bound setup (Earth Engine, folium, OpenAI) is registered here
+instead of running at import time. Each backend is initialized once, either on
+first use through ensure(name) or ahead of time by the background thread from
+start(), which retries failed backends with backoff. status() and readiness()
+report which backends are warm for the /ready endpoint: required backends gate
+readiness, optional ones only mark the instance as degraded.
+
+    warmup.register('earth_engine', init_ee)
+    warmup.register('openai', init_openai, required=False)
+    warmup.start()                  # background thread, returns immediately
+    warmup.ensure('earth_engine')   # blocks until initialized (or raises)
+"""
+
+import os
+import threading
+import time
+
+_backends = {}
+_lock = threading.Lock()
+
+# Seconds before the first retry of a failed warm-up, doubled up to the maximum
+RETRY_SECONDS = float(os.getenv('WARMUP_RETRY_SECONDS', '5'))
+MAX_RETRY_SECONDS = float(os.getenv('WARMUP_MAX_RETRY_SECONDS', '300'))
+
+
+class _Backend:
+    def __init__(self, name, init, required):
+        self.name = name
+        self.init = init
+        self.required = required
+        self.lock = threading.Lock()
+        self.state = 'cold'
+        self.error = None
+        self.seconds = None
+
+
+def register(name, init, required=True):
+    """
+    Register a zero-argument initializer under a backend name. READY_BACKENDS
+    (comma-separated names) overrides which backends are required for readiness.
+    """
+    names = os.getenv('READY_BACKENDS')
+    if names is not None:
+        required = name in {n.strip() for n in names.split(',')}
+    with _lock:
+        _backends[name] = _Backend(name, init, required)
+
+
+def ensure(name):
+    """Initialize the backend if it is not warm yet; re-raises the initializer's error"""
+    backend = _backends[name]
+    if backend.state == 'ready':
+        return
+    with backend.lock:
+        if backend.state == 'ready':
+            return
+        backend.state = 'warming'
+        started = time.perf_counter()
+        try:
+            backend.init()
+        except Exception as e:
+            backend.state = 'failed'
+            backend.error = str(e)
+            raise
+        finally:
+            backend.seconds = time.perf_counter() - started
+        backend.state = 'ready'
+        backend.error = None
+
+
+def _warm_all(names):
+    delay = RETRY_SECONDS
+    while True:
+        failed = []
+        for name in names:
+            try:
+                ensure(name)
+            except Exception as e:
+                failed.append(name)
+                print(f"⚠️ Warm-up of {name} failed: {e}")
+        if not failed or delay <= 0:
+            return
+        print(f"⚠️ Retrying warm-up of {', '.join(failed)} in {delay:g}s")
+        time.sleep(delay)
+        names = failed
+        delay = min(delay * 2, MAX_RETRY_SECONDS)
+
+
+def start(names=None):
+    """
+    Warm the given backends (default: all registered) in a daemon thread, retrying
+    failures with exponential backoff (WARMUP_RETRY_SECONDS=0 disables retries)
+    """
+    names = list(names or _backends)
+    thread = threading.Thread(target=_warm_all, args=(names,), name='backend-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def status():
+    """{name: {'state', 'required', 'seconds', 'error'}} for every registered backend"""
+    with _lock:
+        backends = list(_backends.values())
+    return {
+        b.name: {'state': b.state, 'required': b.required, 'seconds': b.seconds, 'error': b.error}
+        for b in backends
+    }
+
+
+def readiness():
+    """(ready, degraded): ready once every required backend is warm; degraded lists optional ones that are not"""
+    backends = status()
+    ready = all(info['state'] == 'ready' for info in backends.values() if info['required'])
+    degraded = [name for name, info in backends.items() if not info['required'] and info['state'] != 'ready']
+    return ready, degraded
+
@@ -0,0 +1,45 @@
+"""
+Production WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (the default in gunicorn.conf.py) this module is imported once
+in the master. Read-only data is loaded here before the workers fork so they
+share it copy-on-write:
+
+    - tide arrays of every station in tide_data_parser.STATION_FILES, memory-mapped
+      from the binary cache (written on first start) so restarts do not re-parse
+    - the flood tile URL of every slider level (PRELOAD_FLOOD_TILES=1, needs Earth Engine)
+
+Backend warm-up threads do not survive fork, so they are started per worker
+from the post_fork hook instead of at import. Metrics and profiles are shared
+between workers through METRICS_DIR and PROFILE_DIR (set in gunicorn.conf.py).
+"""
+
+import gc
+import os
+
+# Start warm-up threads in the workers (see gunicorn.conf.py), not in the master
+os.environ.setdefault('WARMUP', '0')
+
+from app import app
+import tide_data_parser
+import NY_coastline_script
+
+
+def preload():
+    """Load shared read-only data; returns a summary for the startup log"""
+    summary = {'tide_records': tide_data_parser.preload_stations()}
+    if os.getenv('PRELOAD_FLOOD_TILES', '0') == '1':
+        try:
+            summary['flood_tiles'] = len(NY_coastline_script.preload_flood_tiles())
+        except Exception as e:
+            print(f"⚠️ Could not preload flood tiles: {e}")
+    # Move everything loaded so far out of the collector's generations so that gc
+    # passes in the workers do not write to (and un-share) these pages
+    gc.freeze()
+    return summary
+
+
+PRELOADED = preload()
+print(f"✅ Preloaded {PRELOADED}")